@@ -1,7 +1,93 @@
 # coding=utf-8
-from .libs.decorator import decorate
+import os
+import sys
+from functools import partial
+from itertools import izip
+from threading import Event, Lock, Thread, local
+from timeit import default_timer
+from weakref import WeakSet
+
+from .libs.decorator import FunctionMaker
 from .utils import ClassUtils, FuncUtils, ImportUtils
 
+# Marks a value that has not been built or imported yet.
+_missing = object()
+
+
+class _Snapshot(object):
+    """
+    The flattened providers of a profile for one generation of the registry,
+    it is never changed after it is published.
+    """
+    __slots__ = ('generation', 'profile', 'providers')
+
+    def __init__(self, generation, profile, providers):
+        self.generation = generation
+        self.profile = profile
+        self.providers = providers
+
+
+class _ProfileContext(object):
+    """
+    Uses a profile for the current thread inside of a 'with' block.
+    """
+    def __init__(self, name):
+        self.__name = name
+
+    def __enter__(self):
+        if not hasattr(_profiles, 'stack'):
+            _profiles.stack = []
+
+        _profiles.stack.append(self.__name)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _profiles.stack.pop()
+
+
+# The profiles used by the current thread with Sqeezz.using_profile.
+_profiles = local()
+
+
+def _check_cycles(providers, names):
+    """
+    Follow the dependencies of the providers from the given names and raise
+    a RuntimeError when a provider depends on itself.
+
+    :param providers: dictionary of providers
+    :param names: names of the changed providers
+    :return: None
+    """
+    def dependencies(name):
+        provider = providers.get(name)
+
+        return provider.dependencies if isinstance(provider, Lifetime) else ()
+
+    done = set()
+
+    for name in names:
+        if name in done:
+            continue
+
+        path = [name]
+        stack = [iter(dependencies(name))]
+
+        while stack:
+            for child in stack[-1]:
+                if child in done:
+                    continue
+                elif child in path:
+                    raise RuntimeError('Circular dependency: {}'.format(
+                        ' -> '.join(path[path.index(child):] + [child])))
+
+                path.append(child)
+                stack.append(iter(dependencies(child)))
+                break
+            else:
+                stack.pop()
+                done.add(path.pop())
+
 
 class _Inject(FuncUtils):
     """
@@ -10,28 +96,77 @@ class _Inject(FuncUtils):
     __instance = None
 
     class __Inject(object):
+        # Incremented on every change so cached lookups know to be rebuilt.
+        generation = 0
+
         __current_profile = None
         __default_providers = {}
         __profile_providers = {}
+        # Flattened providers for each profile, None is for the defaults.
+        __snapshots = {None: _Snapshot(0, None, __default_providers)}
+        __active = __snapshots[None]
+        # The values above are replaced and never changed once they are
+        # published, so only the writers have to hold the lock.
+        __lock = Lock()
+        # Set by freeze, the providers can't be registered after that.
+        __frozen = False
+
+        @classmethod
+        def active(cls):
+            stack = getattr(_profiles, 'stack', None)
+
+            if stack:
+                snapshots = cls.__snapshots
+
+                return snapshots.get(stack[-1]) or snapshots[None]
+
+            return cls.__active
 
         @classmethod
         def current_profile(cls):
-            return cls.__current_profile
+            stack = getattr(_profiles, 'stack', None)
+
+            return stack[-1] if stack else cls.__current_profile
+
+        @classmethod
+        def compile(cls, plans):
+            with cls.__lock:
+                cls.__compile(plans)
+
+        @classmethod
+        def freeze(cls, plans, frozen=True):
+            with cls.__lock:
+                if frozen:
+                    cls.__compile(plans, lifetimes=True)
+
+                cls.__frozen = frozen
+
+        @classmethod
+        def frozen(cls):
+            return cls.__frozen
 
         @classmethod
         def p_providers(cls):
             return cls.__profile_providers
 
+        @classmethod
+        def provider(cls, name):
+            return cls.active().providers[name]
+
         @classmethod
         def providers(cls):
             return cls.__default_providers.copy()
 
         @classmethod
         def profile(cls, name=None):
-            if name is not None and isinstance(name, (str, unicode)):
+            if name is None or not isinstance(name, (str, unicode)):
+                name = None
+
+            with cls.__lock:
                 cls.__current_profile = name
-            else:
-                cls.__current_profile = None
+                cls.__active = cls.__snapshots.get(name) or cls.__snapshots[
+                    None]
+                cls.generation += 1
 
         @classmethod
         def profiles(cls):
@@ -39,15 +174,100 @@ class _Inject(FuncUtils):
 
         @classmethod
         def register(cls, providers):
-            cp = cls.__current_profile
-            for name, provider in providers.iteritems():
-                if cp is None or name not in cls.__default_providers:
-                    cls.__default_providers[name] = provider
-                else:
-                    if cp not in cls.__profile_providers:
-                        cls.__profile_providers[cp] = {}
+            cls.register_many(((cls.current_profile(), providers),))
+
+        @classmethod
+        def register_many(cls, batches):
+            with cls.__lock:
+                if cls.__frozen:
+                    raise RuntimeError(
+                        'Providers can not be registered after freeze.')
+
+                defaults = cls.__default_providers.copy()
+                profiles = cls.__profile_providers.copy()
+                copied = set()
+                # The provider staged for each (profile, name).
+                staged = {}
+                conflicts = set()
+
+                for cp, providers in batches:
+                    for name, provider in providers.iteritems():
+                        if cp is None or name not in defaults:
+                            key = None, name
+                            defaults[name] = provider
+                        else:
+                            key = cp, name
+
+                            if cp not in copied:
+                                profiles[cp] = dict(profiles.get(cp, ()))
+                                copied.add(cp)
+
+                            profiles[cp][name] = provider
+
+                        if staged.get(key, provider) is not provider:
+                            conflicts.add(name)
+
+                        staged[key] = provider
+
+                if conflicts:
+                    raise RuntimeError('Conflicting providers: {}'.format(
+                        ', '.join(sorted(conflicts))))
+
+                cls.__publish(defaults, profiles,
+                              set(name for cp, name in staged))
+
+        @classmethod
+        def __compile(cls, plans, lifetimes=False):
+            snapshots = cls.__snapshots.values()
+            missing = []
+
+            for snapshot in snapshots:
+                providers = snapshot.providers
+                required = [('{}({})'.format(plan, name), name)
+                            for plan in plans for name in plan.required]
+
+                if lifetimes:
+                    required.extend(
+                        ('{}({})'.format(owner, name), name)
+                        for owner, provider in providers.iteritems()
+                        if isinstance(provider, Lifetime)
+                        for name in provider.dependencies)
+
+                unresolved = sorted(set(label for label, name in required
+                                        if name not in providers))
+
+                if unresolved:
+                    missing.append('{} ({})'.format(
+                        snapshot.profile or 'default', ', '.join(unresolved)))
 
-                    cls.__profile_providers[cp][name] = provider
+            if missing:
+                raise LookupError('Unresolved providers in the profiles: '
+                                  '{}'.format('; '.join(sorted(missing))))
+
+            for plan in plans:
+                plan.compile(snapshots)
+
+        @classmethod
+        def __publish(cls, defaults, profiles, changed=()):
+            generation = cls.generation + 1
+            snapshots = {None: _Snapshot(generation, None, defaults)}
+
+            for name, profile in profiles.iteritems():
+                providers = defaults.copy()
+                providers.update(profile)
+                snapshots[name] = _Snapshot(generation, name, providers)
+
+            if changed:
+                # Nothing is published when the changes add a cycle.
+                for snapshot in snapshots.itervalues():
+                    _check_cycles(snapshot.providers, changed)
+
+            cls.__default_providers = defaults
+            cls.__profile_providers = profiles
+            cls.__snapshots = snapshots
+            cls.__active = snapshots.get(
+                cls.__current_profile) or snapshots[None]
+            cls.generation = generation
 
     @classmethod
     def __init__(cls):
@@ -58,6 +278,10 @@ class _Inject(FuncUtils):
     def __call__(cls, func, *args, **kwargs):
         return cls.__instance(func, args, kwargs)
 
+    @classmethod
+    def instance(cls):
+        return cls.__instance
+
     @classmethod
     def __getattr__(cls, name):
         return getattr(cls.__instance, name)
@@ -72,42 +296,926 @@ class Injected(object):
 
 
 class Imported(object):
+    """
+    This is a placeholder for an imported module, an attribute of the module
+    can be selected with a colon like 'package.module:ClassName'.
+    """
     def __init__(self, name, package=None):
-        self._name = name
+        self._name, _, self._attribute = name.partition(':')
         self._package = package
+        self._value = _missing
 
     def create(self):
-        return ImportUtils.import_module(self._name, self._package)
+        """
+        Import the module the first time and return the stored value after.
+
+        :return: module or attribute of the module
+        """
+        value = self._value
+
+        if value is _missing:
+            value = self.__module()
+
+            for attribute in self._attribute.split('.'):
+                if attribute:
+                    value = getattr(value, attribute)
+
+            self._value = value
+
+        return value
+
+    def invalidate(self):
+        """
+        Forget the stored value so the next injection looks it up again.
+
+        :return: None
+        """
+        self._value = _missing
+
+    def reload(self):
+        """
+        Reload the module and forget the stored value.
+
+        :return: None
+        """
+        reload(self.__module())
+        self.invalidate()
+
+    def __module(self):
+        return ImportUtils.import_module(
+            self._name, self._package).values()[0]
+
+
+class _Metrics(object):
+    """
+    Counts and times the injections when it is enabled, every event is also
+    passed to the callbacks.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.callbacks = []
+        self.__counters = {}
+        self.__lock = Lock()
+
+    def record(self, event, name=None, value=1):
+        """
+        Add the value to the counter of the event and call the callbacks.
+
+        :param event: event name
+        :param name: provider name or None for totals
+        :param value: number to add
+        :return: None
+        """
+        key = event, name
+
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+        for callback in self.callbacks:
+            callback(event, name, value)
+
+    def reset(self):
+        """
+        Set all of the counters back to zero.
+
+        :return: None
+        """
+        with self.__lock:
+            self.__counters = {}
+
+    def snapshot(self):
+        """
+        Copy the counters, the events counted for each provider map the
+        provider names to their counts.
+
+        :return: dictionary of events
+        """
+        snapshot = {}
+
+        with self.__lock:
+            counters = self.__counters.copy()
+
+        for (event, name), value in counters.iteritems():
+            if name is None:
+                snapshot[event] = value
+            else:
+                snapshot.setdefault(event, {})[name] = value
+
+        return snapshot
+
+
+_metrics = _Metrics()
+
+
+def _injects(factory):
+    """
+    Check if a factory, or the __init__ method of a class, is decorated with
+    @inject.
+
+    :param factory: callable
+    :return: boolean
+    """
+    if ClassUtils.is_class(factory):
+        factory = getattr(factory, '__init__', None)
+
+    return hasattr(factory, '__wrapped__')
+
+
+def _dependencies(factory, args, kwargs):
+    """
+    Find the Injected parameters of a factory that are not given by the
+    arguments, a class is checked by its __init__ method. A classic class
+    without an __init__ method has no dependencies.
+
+    :param factory: callable
+    :param args: list/tuple of arguments
+    :param kwargs: dictionary of keyword arguments
+    :return: tuple of provider names
+    """
+    func = factory
+
+    if ClassUtils.is_class(factory):
+        func = getattr(factory, '__init__', None)
+
+        if func is None:
+            return ()
+
+    while hasattr(func, '__wrapped__'):
+        func = func.__wrapped__
+
+    try:
+        spec = FuncUtils.spec(func)
+    except TypeError:
+        # Built-in callables can't be inspected and don't inject anything.
+        return ()
+
+    names = spec.args[1:] if ClassUtils.is_class(factory) else spec.args
+    defaults = spec.defaults or ()
+    offset = len(names) - len(defaults)
+
+    return tuple(name for index, (name, default) in enumerate(
+                     izip(names[offset:], defaults), offset)
+                 if default is Injected and index >= len(args) and
+                 name not in kwargs)
+
+
+class Lifetime(object):
+    """
+    Base class for providers that are built by a factory when they are
+    injected, the subclasses decide how long the built object is kept.
+    """
+    def __init__(self, factory, *args, **kwargs):
+        """
+        Store the factory and the arguments used to build the provider.
+
+        :param factory: callable
+        :param args: varargs
+        :param kwargs: keywords
+        """
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        # The providers the factory injects, they are passed as keywords
+        # unless the factory is decorated with @inject and resolves them
+        # faster from its own plan.
+        self.dependencies = _dependencies(factory, args, kwargs)
+        self.wiring = () if _injects(factory) else self.dependencies
+        self.registry = _Inject().instance()
+        # The snapshot and providers the dependencies were last resolved for.
+        self.wired = None, ()
+
+        if hasattr(factory, '__name__'):
+            self.__name__ = factory.__name__
+
+    def create(self, snapshot=None):
+        """
+        Build a new object with the factory.
+
+        :param snapshot: _Snapshot the dependencies are resolved with
+                         (default: the active snapshot)
+        :return: object
+        """
+        kwargs = self.kwargs
+
+        if self.wiring:
+            kwargs = self.wire(snapshot)
+
+        if _metrics.enabled:
+            start = default_timer()
+
+            try:
+                return self.factory(*self.args, **kwargs)
+            finally:
+                name = getattr(self, '__name__', repr(self))
+                _metrics.record('constructions', name)
+                _metrics.record('construction_seconds', name,
+                                default_timer() - start)
+
+        return self.factory(*self.args, **kwargs)
+
+    def get(self):
+        """
+        Return the object that is injected.
+
+        :return: object
+        """
+        raise NotImplementedError
+
+    def wire(self, snapshot=None):
+        """
+        Resolve the dependencies the factory doesn't inject itself with the
+        providers of a snapshot.
+
+        :param snapshot: _Snapshot (default: the active snapshot)
+        :return: dictionary of keyword arguments for the factory
+        """
+        snapshot = snapshot or self.registry.active()
+        wired_snapshot, wired = self.wired
+
+        if wired_snapshot is not snapshot:
+            providers = snapshot.providers
+            wired = tuple((name, providers[name] if name in providers
+                           else _Unregistered(name))
+                          for name in self.wiring)
+            self.wired = snapshot, wired
+
+        kwargs = self.kwargs.copy()
+
+        for name, provider in wired:
+            if isinstance(provider, _dynamic):
+                provider = provider.get()
+
+            kwargs[name] = provider
+
+        return kwargs
+
+
+class Transient(Lifetime):
+    """
+    Builds a new object every time it is injected.
+    """
+    def get(self):
+        return self.create()
+
+
+class Singleton(Lifetime):
+    """
+    Builds the object the first time it is injected and shares it with every
+    thread after that.
+    """
+    def __init__(self, factory, *args, **kwargs):
+        super(Singleton, self).__init__(factory, *args, **kwargs)
+        self.__instance = _missing
+        self.__lock = Lock()
+
+    def get(self):
+        instance = self.__instance
+
+        if instance is _missing:
+            with self.__lock:
+                if self.__instance is _missing:
+                    self.__instance = self.create()
+
+                instance = self.__instance
+
+        return instance
+
+    @property
+    def built(self):
+        return self.__instance is not _missing
+
+
+class ThreadLocal(Lifetime):
+    """
+    Builds one object for each thread that injects it.
+    """
+    def __init__(self, factory, *args, **kwargs):
+        super(ThreadLocal, self).__init__(factory, *args, **kwargs)
+        self.__local = local()
+
+    def get(self):
+        try:
+            return self.__local.instance
+        except AttributeError:
+            self.__local.instance = self.create()
+
+            return self.__local.instance
+
+
+class _Build(object):
+    """
+    One attempt of a Deferred provider to build its object.
+    """
+    __slots__ = ('done', 'error', 'instance')
+
+    def __init__(self):
+        self.done = Event()
+        self.error = None
+        self.instance = _missing
+
+
+class Deferred(Lifetime):
+    """
+    Builds the object once in a background thread, like a Singleton that is
+    a future. A function that injects several of them starts all of them
+    before it waits for any, so they are built at the same time.
+
+    The dependencies are resolved with the providers and scopes of the thread
+    that started it. When the factory fails, the error is raised by get and
+    the next get tries again.
+    """
+    def __init__(self, factory, *args, **kwargs):
+        super(Deferred, self).__init__(factory, *args, **kwargs)
+        self.__build = None
+        self.__lock = Lock()
+
+    def get(self):
+        build = self.start()
+        build.done.wait()
+
+        if build.error is not None:
+            with self.__lock:
+                if self.__build is build:
+                    self.__build = None
+
+            exc_type, exc_val, exc_tb = build.error
+            raise exc_type, exc_val, exc_tb
+
+        return build.instance
+
+    def start(self, snapshot=None):
+        """
+        Start building the object if it has not been started yet.
+
+        :param snapshot: _Snapshot the dependencies are resolved with
+                         (default: the active snapshot of this thread)
+        :return: _Build of the object
+        """
+        build = self.__build
+
+        if build is None:
+            with self.__lock:
+                build = self.__build
+
+                if build is None:
+                    build = self.__build = _Build()
+                    thread = Thread(target=self.__run, args=(
+                        build, snapshot or self.registry.active(),
+                        list(getattr(_scopes, 'stack', ()))))
+                    thread.daemon = True
+                    thread.start()
+
+        return build
+
+    def __run(self, build, snapshot, scopes):
+        # The factory and the providers it injects resolve with the profile
+        # of the thread that started it.
+        _profiles.stack = [snapshot.profile]
+        _scopes.stack = scopes
+
+        try:
+            build.instance = self.create(snapshot)
+        except BaseException:
+            build.error = sys.exc_info()
+        finally:
+            build.done.set()
+
+    @property
+    def built(self):
+        build = self.__build
+
+        return (build is not None and build.done.is_set() and
+                build.error is None)
+
+
+class Scoped(Lifetime):
+    """
+    Builds one object for each 'with Sqeezz.scope():' block that injects it.
+    """
+    def get(self):
+        try:
+            scope = _scopes.stack[-1]
+        except (AttributeError, IndexError):
+            raise RuntimeError('{} was injected outside of a scope.'.format(
+                getattr(self, '__name__', repr(self))))
+
+        return scope.get(self)
+
+    def release(self, instance):
+        """
+        Called with the object that was built for a scope when the scope
+        ends, it does nothing unless a subclass overrides it.
+
+        :param instance: object
+        :return: None
+        """
+
+
+class _Scope(object):
+    """
+    Stores the objects built by Scoped providers for a 'with' block.
+    """
+    def __init__(self):
+        self.__instances = {}
+
+    def __enter__(self):
+        if not hasattr(_scopes, 'stack'):
+            _scopes.stack = []
+
+        _scopes.stack.append(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _scopes.stack.remove(self)
+        instances, self.__instances = self.__instances, {}
+
+        for provider, instance in instances.iteritems():
+            provider.release(instance)
+
+    def get(self, provider):
+        if provider not in self.__instances:
+            self.__instances[provider] = provider.create()
+
+        return self.__instances[provider]
+
+
+# The scopes that are active in the current thread.
+_scopes = local()
+
+
+class _Bulk(object):
+    """
+    Stages the providers registered in a 'with' block and registers all of
+    them at the end with a single update of the registry.
+    """
+    def __init__(self):
+        self.batches = []
+        self.callbacks = []
+
+    def __enter__(self):
+        if not hasattr(_bulks, 'stack'):
+            _bulks.stack = []
+
+        _bulks.stack.append(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _bulks.stack.pop()
+
+        if exc_type is not None:
+            return
+
+        if _bulks.stack:
+            # A nested block is registered with the outer block.
+            _bulks.stack[-1].batches.extend(self.batches)
+            _bulks.stack[-1].callbacks.extend(self.callbacks)
+            return
+
+        if self.batches:
+            _Inject().register_many(self.batches)
+
+        for callback in self.callbacks:
+            callback()
+
+    def stage(self, providers):
+        """
+        Store the providers with the profile they are registered in.
+
+        :param providers: dictionary of providers
+        :return: None
+        """
+        self.batches.append((_Inject().current_profile(), providers))
+
+
+# The bulk registrations that are active in the current thread.
+_bulks = local()
+
+
+def _after_register(callback):
+    """
+    Call the callback once the providers registered so far are registered,
+    which is at the end of the bulk registration when there is one.
+
+    :param callback: callable without arguments
+    :return: None
+    """
+    stack = getattr(_bulks, 'stack', None)
+
+    if stack:
+        stack[-1].callbacks.append(callback)
+    else:
+        callback()
+
+
+class _Unregistered(object):
+    """
+    Stands in for a provider that was not registered when the providers were
+    resolved, it raises the KeyError when it is injected.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def get(self):
+        raise KeyError(self.name)
+
+
+# Providers that have to be asked for the object that is injected.
+_dynamic = (Lifetime, _Unregistered)
+
+# The lines generated for each injected parameter of a wrapper.
+_TARGET_TEMPLATE = (
+    'if {name} is _Injected_:',
+    '    {name} = _providers_[{position}]',
+    '    if isinstance({name}, _dynamic_):',
+    '        {name} = {name}.get()',
+    'elif isinstance({name}, _Imported_):',
+    '    {name} = {name}.create()')
+
+# The plans of the functions decorated with @inject, they are compiled by
+# Sqeezz.freeze.
+_plans = WeakSet()
+
+# The names used by the generated wrapper.
+_RESERVED = frozenset(['_Imported_', '_Injected_', '_deferred_', '_dynamic_',
+                       '_func_', '_metrics_', '_plan_', '_providers_',
+                       '_registry_', '_resolved_', '_snapshot_'])
+
+
+def _placeholder(value):
+    """
+    Check if a value is an Injected or Imported placeholder.
+
+    :param value: object
+    :return: boolean
+    """
+    return value is Injected or isinstance(value, Imported)
+
+
+class _InjectionPlan(FuncUtils):
+    """
+    Stores the parameters of a function that are injected, this is built once
+    when the function is decorated so a call only has to look up the providers.
+    """
+    def __init__(self, func, args=(), kwargs=None):
+        """
+        Find the parameters that default to an Injected or Imported
+        placeholder, or that are given one by the arguments of a call.
+
+        :param func: callable
+        :param args: list/tuple of arguments of a single call
+        :param kwargs: dictionary of keyword arguments of a single call
+        """
+        spec = self.spec(func)
+        defaults = spec.defaults or ()
+        offset = len(spec.args) - len(defaults)
+        kwargs = kwargs or {}
+        count = len(args)
+        targets = []
+
+        for index, name in enumerate(spec.args):
+            default = (defaults[index - offset] if index >= offset
+                       else _missing)
+            value = args[index] if index < count else kwargs.get(name)
+
+            if _placeholder(default) or _placeholder(value):
+                targets.append((index, name, default))
+
+        self.func = func
+        self.names = tuple(spec.args)
+        self.targets = tuple(targets)
+        self.required = tuple(name for index, name, default in self.targets
+                              if default is Injected)
+        self.registry = _Inject().instance()
+        # The providers resolved for each snapshot of the newest generation,
+        # with the positions of the Deferred providers among them.
+        self.cache = {}
+        self.generation = None
+
+    def __call__(self, func, *args, **kwargs):
+        """
+        Replace the placeholders with the providers and call the function.
+
+        :param func: callable
+        :param args: varargs
+        :param kwargs: keywords
+        :return: the function's return value
+        """
+        if _metrics.enabled:
+            return self.traced(*args, **kwargs)
+
+        args = self.bind(self.registry.active(), args, kwargs)
+
+        return func(*args, **kwargs)
+
+    def __str__(self):
+        return '{}.{}'.format(self.func.__module__, getattr(
+            self.func, '__qualname__', self.func.__name__))
+
+    def bind(self, snapshot, args, kwargs):
+        """
+        Replace the placeholders in the arguments with the providers.
+
+        :param snapshot: _Snapshot the providers are resolved with
+        :param args: list/tuple of arguments
+        :param kwargs: dictionary of keyword arguments, updated in place
+        :return: list of arguments
+        """
+        resolved = self.providers(snapshot)
+        providers, deferred = resolved
+        args = list(args)
+        count = len(args)
+
+        if deferred:
+            self.start(snapshot, resolved, [
+                args[index] if index < count else kwargs.get(name, default)
+                for index, name, default in self.targets])
+
+        for position, (index, name, default) in enumerate(self.targets):
+            if index < count:
+                args[index] = self.resolve(args[index], providers[position])
+            else:
+                kwargs[name] = self.resolve(kwargs.get(name, default),
+                                            providers[position])
+
+        return args
+
+    def compile(self, snapshots):
+        """
+        Resolve the providers for the snapshots and import the Imported
+        placeholders ahead of the calls, nothing is built.
+
+        :param snapshots: list of _Snapshot objects
+        :return: None
+        """
+        for index, name, default in self.targets:
+            if isinstance(default, Imported):
+                default.create()
+
+        for snapshot in snapshots:
+            self.refresh(snapshot)
+
+    def providers(self, snapshot):
+        """
+        The providers for a snapshot of the current registry generation.
+
+        :param snapshot: _Snapshot of the active profile
+        :return: tuple of the providers and the positions of the Deferred
+                 providers
+        """
+        resolved = self.cache.get(snapshot)
+
+        if resolved is None:
+            resolved = self.refresh(snapshot)
+
+        return resolved
+
+    def refresh(self, snapshot):
+        """
+        Resolve the providers for a snapshot of the registry, the providers
+        are looked up and not built.
+
+        :param snapshot: _Snapshot of the active profile
+        :return: tuple of the providers and the positions of the Deferred
+                 providers
+        """
+        registry = snapshot.providers
+        providers = []
+
+        for index, name, default in self.targets:
+            if name in registry:
+                providers.append(registry[name])
+            else:
+                providers.append(_Unregistered(name))
+
+        resolved = tuple(providers), tuple(
+            position for position, provider in enumerate(providers)
+            if isinstance(provider, Deferred))
+
+        if self.generation == snapshot.generation:
+            self.cache[snapshot] = resolved
+        else:
+            # Drop the providers of the older generations.
+            self.cache = {snapshot: resolved}
+            self.generation = snapshot.generation
+
+        return resolved
+
+    @staticmethod
+    def start(snapshot, resolved, values):
+        """
+        Start building the Deferred providers of the parameters that are
+        injected, before any of them is waited for.
+
+        :param snapshot: _Snapshot the providers are built with
+        :param resolved: tuple of the providers and the positions of the
+                         Deferred providers from refresh
+        :param values: list/tuple of the values of the injected parameters
+        :return: None
+        """
+        providers, deferred = resolved
+
+        for position in deferred:
+            if values[position] is Injected:
+                providers[position].start(snapshot)
+
+    @staticmethod
+    def resolve(value, provider):
+        """
+        Return the provider for a placeholder or the value when it was passed.
+
+        :param value: argument value
+        :param provider: cached provider for the parameter
+        :return: provider or value
+        """
+        if value is Injected:
+            if isinstance(provider, _dynamic):
+                return provider.get()
+
+            return provider
+        elif isinstance(value, Imported):
+            return value.create()
+
+        return value
+
+    def traced(self, *args, **kwargs):
+        """
+        Call the function like __call__ while recording the metrics.
+
+        :param args: varargs
+        :param kwargs: keywords
+        :return: the function's return value
+        """
+        start = default_timer()
+        snapshot = self.registry.active()
+
+        if snapshot in self.cache:
+            _metrics.record('cache_hits')
+        else:
+            _metrics.record('cache_misses')
+
+        count = len(args)
+
+        for index, name, default in self.targets:
+            value = args[index] if index < count else kwargs.get(name, default)
+
+            if _placeholder(value):
+                _metrics.record('resolutions', name)
+
+        args = self.bind(snapshot, args, kwargs)
+        resolved = default_timer()
+        _metrics.record('resolve_seconds', value=resolved - start)
+
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            _metrics.record('call_seconds', value=default_timer() - resolved)
+
+    def wrap(self):
+        """
+        Generate a wrapper with the signature of the function that replaces
+        the placeholders in its own locals and calls the function directly.
+
+        :return: function
+        """
+        for name in _RESERVED.intersection(self.names):
+            raise NameError('{} is overridden in {}'.format(
+                name, self.func.__name__))
+
+        body = ['if _metrics_.enabled:',
+                '    return _plan_.traced(%(shortsignature)s)',
+                '_snapshot_ = _registry_.active()',
+                '_resolved_ = _plan_.cache.get(_snapshot_)',
+                'if _resolved_ is None:',
+                '    _resolved_ = _plan_.refresh(_snapshot_)',
+                '_providers_, _deferred_ = _resolved_']
+
+        if self.targets:
+            # The Deferred providers are started before any is waited for.
+            names = ', '.join(name for index, name, default in self.targets)
+            body.extend(['if _deferred_:',
+                         '    _plan_.start(_snapshot_, _resolved_, '
+                         '({},))'.format(names)])
+
+        for position, (index, name, default) in enumerate(self.targets):
+            body.extend(line.format(name=name, position=position)
+                        for line in _TARGET_TEMPLATE)
+
+        body.append('return _func_(%(shortsignature)s)')
+
+        evaldict = dict(_Imported_=Imported, _Injected_=Injected,
+                        _dynamic_=_dynamic, _func_=self.func,
+                        _metrics_=_metrics, _plan_=self,
+                        _registry_=self.registry)
+        wrapper = FunctionMaker.create(self.func, '\n'.join(body), evaldict,
+                                       __wrapped__=self.func)
+
+        if hasattr(self.func, '__qualname__'):
+            wrapper.__qualname__ = self.func.__qualname__
+
+        if self.registry.frozen():
+            self.registry.compile((self,))
+
+        _plans.add(self)
+
+        return wrapper
+
+
+class _LazyModule(Singleton):
+    """
+    A provider that imports the module the first time it is injected.
+    """
+    def __init__(self, loader, name, path):
+        """
+        Store the ImportUtils loader and its arguments.
+
+        :param loader: ImportUtils.import_module or ImportUtils.load_module
+        :param name: module name
+        :param path: package or file path
+        """
+        super(_LazyModule, self).__init__(loader, name, path)
+        self.path = path if loader is ImportUtils.load_module else name
+
+    def create(self, snapshot=None):
+        return super(_LazyModule, self).create(snapshot).values()[0]
 
 
 class ModuleLoader(object):
+    __lazy = {}
+
     @classmethod
     def register(cls, *names):
-        for name in names:
-            if hasattr(name, 'iteritems'):
-                for n, package in name.iteritems():
-                    cls._register(ImportUtils.import_module(n, package))
-            else:
-                cls._register(ImportUtils.import_module(name))
+        with Sqeezz.bulk():
+            for name in names:
+                if hasattr(name, 'iteritems'):
+                    for n, package in name.iteritems():
+                        cls._register(ImportUtils.import_module(n, package))
+                else:
+                    cls._register(ImportUtils.import_module(name))
+
+    @classmethod
+    def register_lazy(cls, *names):
+        with Sqeezz.bulk():
+            for name in names:
+                if hasattr(name, 'iteritems'):
+                    for n, package in name.iteritems():
+                        cls._register_lazy(n.split('.')[-1], _LazyModule(
+                            ImportUtils.import_module, n, package))
+                else:
+                    cls._register_lazy(name.split('.')[-1], _LazyModule(
+                        ImportUtils.import_module, name, None))
 
     @classmethod
     def register_new(cls, *names, **packages):
-        for name in names:
-            cls._register(ImportUtils.load_module(name, name + '.py'))
-        for name, path in packages.iteritems():
-            cls._register(ImportUtils.load_module(name, path))
+        with Sqeezz.bulk():
+            for name in names:
+                cls._register(ImportUtils.load_module(name, name + '.py'))
+            for name, path in packages.iteritems():
+                cls._register(ImportUtils.load_module(name, path))
+
+    @classmethod
+    def register_new_lazy(cls, *names, **packages):
+        packages.update((name, name + '.py') for name in names)
+
+        with Sqeezz.bulk():
+            for name, path in packages.iteritems():
+                # The path is resolved now, the module may be loaded after the
+                # working directory changed.
+                cls._register_lazy(name, _LazyModule(
+                    ImportUtils.load_module, name, os.path.abspath(path)))
+
+    @classmethod
+    def unloaded(cls):
+        """
+        The lazy modules that have not been injected yet.
+
+        :return: dictionary of provider names mapped to module names/paths
+        """
+        return dict((name, module.path)
+                    for name, module in cls.__lazy.iteritems()
+                    if not module.built)
 
     @staticmethod
     def _register(mod):
         if mod:
             Sqeezz.register(**mod)
 
+    @classmethod
+    def _register_lazy(cls, name, module):
+        Sqeezz.register(**{name: module})
+        _after_register(partial(cls.__lazy.__setitem__, name, module))
+
 
 class Sqeezz(object):
     @staticmethod
     def current_profile():
         return _Inject().current_profile()
 
+    @staticmethod
+    def freeze(frozen=True):
+        _Inject().freeze(tuple(_plans), frozen)
+
     @staticmethod
     def inject(func, *args, **kwargs):
         return _inject(func, *args, **kwargs)()
@@ -125,55 +1233,58 @@ class Sqeezz(object):
         for provider in providers:
             if hasattr(provider, '__name__'):
                 kwproviders[provider.__name__] = provider
-        _Inject().register(kwproviders)
 
+        stack = getattr(_bulks, 'stack', None)
 
-def _inject(func, *args, **kwargs):
-    inj = _Inject()
-    providers = inj.providers()
-    mapped_args = inj.create_args_dict(func, args)
+        if stack:
+            stack[-1].stage(kwproviders)
+        else:
+            _Inject().register(kwproviders)
 
-    def inject_provider():
-        kwargs.update(mapped_args)
+    @staticmethod
+    def bulk():
+        return _Bulk()
 
-        for arg_name, provider in kwargs.iteritems():
-            try:
-                if provider is Injected:
-                    kwargs[arg_name] = providers[arg_name]
-                elif isinstance(provider, Imported):
-                    kwargs[arg_name] = provider.create().values()[0]
-            except TypeError:
-                # Could have a type error
-                pass
+    @staticmethod
+    def scope():
+        return _Scope()
 
-    def set_profile_providers():
-        if inj.current_profile() in inj.p_providers():
-            providers.update(inj.p_providers()[inj.current_profile()])
+    @staticmethod
+    def using_profile(name=None):
+        return _ProfileContext(name)
 
-    set_profile_providers()
-    inj.remove_invalid_kwargs(func, args, kwargs)
-    inject_provider()
+    @staticmethod
+    def instrument(enabled=True, *callbacks):
+        if enabled:
+            _metrics.callbacks.extend(callbacks)
+        else:
+            del _metrics.callbacks[:]
 
-    return func(**kwargs)
+        _metrics.enabled = enabled
 
+    @staticmethod
+    def metrics(reset=False):
+        snapshot = _metrics.snapshot()
 
-def _register(name):
-    def _inner(call, *args, **kwargs):
-        if name:
-            Sqeezz.register(**{name: call})
-        else:
-            Sqeezz.register(call)
+        if reset:
+            _metrics.reset()
+
+        return snapshot
 
-        return call(*args, **kwargs)
-    return _inner
+
+def _inject(func, *args, **kwargs):
+    return _InjectionPlan(func, args, kwargs)(func, *args, **kwargs)
 
 
 def inject(func):
-    return decorate(func, _inject)
+    return _InjectionPlan(func).wrap()
 
 
-def register(name=None):
+def register(name=None, lifetime=None):
     def _inner(call):
-        return decorate(call, _register(name))
+        provider = call if lifetime is None else lifetime(call)
+        Sqeezz.register(**{name or call.__name__: provider})
+
+        return call
 
     return _inner
@@ -0,0 +1,305 @@
+# coding=utf-8
+"""
+Micro-benchmarks for Sqeezz and the optional packages.
+
+Run with 'python -m sqeezz.bench' and the results are written as JSON to the
+standard output or to the file given with '--output'.
+"""
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from functools import partial
+
+from . import Injected, Sqeezz, Transient, inject
+from .libs.decorator import FunctionMaker, decorate
+
+try:
+    from sqeezz_modifiers import Call, Data, Pool, strict_type, test_type
+except ImportError:
+    Call = None
+
+try:
+    from sqeezz_magic import StringConcat
+    from sqeezz_magic.magic_path import File, Path, Walker
+except ImportError:
+    StringConcat = None
+
+
+class Bench(object):
+    """
+    Collects the timings of the benchmarks.
+    """
+    def __init__(self, number=10000, repeat=3):
+        """
+        Store how many times each benchmark is run.
+
+        :param number: calls for each timing
+        :param repeat: timings for each benchmark, the best is kept
+        """
+        self.number = number
+        self.repeat = repeat
+        self.results = {}
+
+    def time(self, name, func, number=None):
+        """
+        Time a callable and store the best time for a single call.
+
+        :param name: benchmark name
+        :param func: callable without arguments
+        :param number: calls for each timing, at least one (default:
+                       self.number)
+        :return: seconds for a single call
+        """
+        number = self.number if number is None else max(1, number)
+        best = min(timeit.Timer(func).repeat(self.repeat, number))
+        self.results[name] = {'number': number,
+                              'usec_per_call': best / number * 1e6}
+
+        return best / number
+
+    def report(self):
+        """
+        The results with information about the interpreter.
+
+        :return: dictionary
+        """
+        return {'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'number': self.number,
+                'repeat': self.repeat,
+                'benchmarks': self.results}
+
+
+def _injected_func(count):
+    """
+    Build a function that has the given number of injected parameters.
+
+    :param count: number of injected parameters
+    :return: function
+    """
+    params = ', '.join('bench_{}=Injected'.format(i) for i in xrange(count))
+    evaldict = {'Injected': Injected}
+
+    exec 'def func({}):\n    return None\n'.format(params) in evaldict
+
+    return evaldict['func']
+
+
+def bench_inject(bench):
+    for providers in (10, 1000):
+        for count in (0, 5, 50):
+            # Every injected parameter needs a provider.
+            registered = max(providers, count)
+            Sqeezz.register(**dict(('bench_{}'.format(i), i)
+                                   for i in xrange(registered)))
+            func = _injected_func(count)
+            name = '{{}}[params={},providers={}]'.format(count, registered)
+
+            bench.time(name.format('plain_call'), func)
+            bench.time(name.format('inject_call'), inject(func))
+
+
+def bench_graph(bench):
+    def factory(depth):
+        if not depth:
+            return lambda: None
+
+        evaldict = {'Injected': Injected, 'inject': inject}
+        exec ('@inject\ndef func(bench_graph_{}=Injected):\n'
+              '    return None\n'.format(depth - 1)) in evaldict
+
+        return evaldict['func']
+
+    Sqeezz.register(**dict(('bench_graph_{}'.format(i), Transient(factory(i)))
+                           for i in xrange(10)))
+    func = inject(lambda bench_graph_9=Injected: bench_graph_9)
+
+    bench.time('transient_graph[depth=10]', func)
+
+
+def bench_register(bench):
+    bench.time('register', lambda: Sqeezz.register(bench_register=object))
+
+    names = ['bench_register_{}'.format(i) for i in xrange(1000)]
+
+    def register_each():
+        for name in names:
+            Sqeezz.register(**{name: object})
+
+    def register_bulk():
+        with Sqeezz.bulk():
+            register_each()
+
+    bench.time('register_each[1000]', register_each, bench.number // 1000)
+    bench.time('register_bulk[1000]', register_bulk, bench.number // 1000)
+
+
+def bench_profile(bench):
+    Sqeezz.profile('bench')
+    Sqeezz.register(bench_0='profile')
+    Sqeezz.profile()
+
+    def switch():
+        Sqeezz.profile('bench')
+        Sqeezz.profile()
+
+    bench.time('profile_switch', switch)
+
+    func = inject(_injected_func(5))
+
+    def switch_call():
+        Sqeezz.profile('bench')
+        func()
+        Sqeezz.profile()
+        func()
+
+    bench.time('profile_switch_call', switch_call)
+
+
+def bench_decorator(bench):
+    def func(arg1, arg2, arg3=None):
+        pass
+
+    def caller(f, *args, **kwargs):
+        return f(*args, **kwargs)
+
+    maker = FunctionMaker(func)
+
+    bench.time('decorate', lambda: decorate(func, caller), bench.number // 10)
+    bench.time('function_maker_make', lambda: maker.make(
+        'def %(name)s(%(signature)s):\n    return None',
+        {}), bench.number // 10)
+    bench.time('inject_decorate', lambda: inject(func), bench.number // 10)
+
+
+def bench_modifiers(bench):
+    if Call is None:
+        return
+
+    def func(arg1, arg2, arg3=None):
+        return arg1
+
+    call = Call(func, 1, arg3=3)
+    partial_call = partial(func, arg3=3)
+
+    bench.time('call_plain', lambda: func(1, 2, 3))
+    bench.time('call_partial', lambda: partial_call(1, 2))
+    bench.time('call_modifier', lambda: call(1, 2))
+
+    for checking in (False, True):
+        test_type(checking)
+        checked = strict_type(int, int, arg3=(int, None))(func)
+        bench.time('strict_type[checking={}]'.format(checking),
+                   lambda: checked(1, 2, None))
+
+    test_type(False)
+
+    class Connection(object):
+        def close(self):
+            pass
+
+    def connect():
+        return Connection()
+
+    def with_data(data):
+        with data:
+            pass
+
+    bench.time('data_with', partial(with_data, Data(connect)))
+    bench.time('pool_with', partial(with_data, Pool(connect)))
+
+
+def bench_magic(bench):
+    if StringConcat is None:
+        return
+
+    def concat():
+        string = StringConcat()
+
+        for i in xrange(100):
+            string += 'line of a report'
+
+        return unicode(string)
+
+    bench.time('string_concat[100]', concat, bench.number // 10)
+
+    root = tempfile.mkdtemp()
+
+    try:
+        for i in xrange(10):
+            directory = os.path.join(root, str(i))
+            os.mkdir(directory)
+
+            for j in xrange(10):
+                open(os.path.join(directory, str(j)), 'w').close()
+
+        def walk():
+            for path, dirs, files in Walker(root):
+                list(dirs)
+                list(files)
+
+        bench.time('path_create', lambda: Path(root))
+        bench.time('walker[10x10]', walk, bench.number // 100)
+
+        data = os.path.join(root, 'data')
+
+        with open(data, 'wb') as data_file:
+            data_file.write(b'line of a log file\n' * 50000)
+
+        def read_lines():
+            for line in open(data):
+                pass
+
+        def read_file_lines():
+            with File(data).lines() as lines:
+                for line in lines:
+                    pass
+
+        def read_chunks():
+            for chunk in File(data).chunks():
+                pass
+
+        def read_mmap():
+            with File(data).mmap() as view:
+                view[-1:]
+
+        bench.time('file_lines[open]', read_lines, bench.number // 100)
+        bench.time('file_lines', read_file_lines, bench.number // 100)
+        bench.time('file_chunks', read_chunks, bench.number // 100)
+        bench.time('file_mmap', read_mmap, bench.number // 100)
+    finally:
+        shutil.rmtree(root)
+
+
+BENCHMARKS = (bench_inject, bench_graph, bench_register, bench_profile,
+              bench_decorator, bench_modifiers, bench_magic)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Sqeezz micro-benchmarks.')
+    parser.add_argument('-n', '--number', type=int, default=10000,
+                        help='calls for each timing')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='timings for each benchmark')
+    parser.add_argument('-o', '--output', help='file for the JSON results')
+    args = parser.parse_args(argv)
+
+    bench = Bench(args.number, args.repeat)
+
+    for benchmark in BENCHMARKS:
+        benchmark(bench)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(bench.report(), output, indent=2, sort_keys=True)
+    else:
+        json.dump(bench.report(), sys.stdout, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,9 @@ from __future__ import print_function
 
 import re
 import sys
+import abc
+import types
+import weakref
 import inspect
 import operator
 import itertools
@@ -67,6 +70,13 @@ else:
     def get_init(cls):
         return cls.__init__.__func__
 
+try:  # Python >= 3.4
+    from abc import get_cache_token
+except ImportError:
+    def get_cache_token():
+        "Changes whenever a virtual subclass is registered with an ABC"
+        return abc.ABCMeta._abc_invalidation_counter
+
 # getargspec has been deprecated in Python 3.5
 ArgSpec = collections.namedtuple(
     'ArgSpec', 'args varargs varkw defaults')
@@ -79,6 +89,10 @@ def getargspec(f):
 
 DEF = re.compile('\s*def\s*([_\w][_\w\d]*)\s*\(')
 
+# Name the cached code is compiled with, so functions that only differ by
+# their name share it; __name__ is set by update
+CODE_NAME = '_decorated_'
+
 
 # basic functionality
 class FunctionMaker(object):
@@ -91,6 +105,13 @@ class FunctionMaker(object):
     # Atomic get-and-increment provided by the GIL
     _compile_count = itertools.count()
 
+    # Code objects of the generated functions keyed by their source
+    _code_cache = {}
+
+    # Compile every function with a unique filename instead of reusing the
+    # cached code, set it to True when profiling
+    unique_filenames = False
+
     def __init__(self, func=None, name=None, signature=None,
                  defaults=None, doc=None, module=None, funcdict=None):
         self.shortsignature = signature
@@ -182,18 +203,38 @@ class FunctionMaker(object):
         if not src.endswith('\n'):  # add a newline for old Pythons
             src += '\n'
 
-        # Ensure each generated function has a unique filename for profilers
-        # (such as cProfile) that depend on the tuple of (<filename>,
-        # <definition line>, <function name>) being unique.
-        filename = '<decorator-gen-%d>' % (next(self._compile_count),)
-        try:
-            code = compile(src, filename, 'single')
-            exec(code, evaldict)
-        except:
-            print('Error in generated code:', file=sys.stderr)
-            print(src, file=sys.stderr)
-            raise
-        func = evaldict[name]
+        # the cached code is keyed by the signature and the body, unless the
+        # template uses the name in the body too
+        code_name, code_src = name, src
+        if not self.unique_filenames and src_templ.count('%(name)s') == 1:
+            code_name = CODE_NAME
+            code_src = src_templ % dict(vars(self), name=CODE_NAME)
+            if not code_src.endswith('\n'):
+                code_src += '\n'
+
+        code = (None if self.unique_filenames
+                else self._code_cache.get(code_src))
+        if code is None:
+            # Ensure each generated function has a unique filename for
+            # profilers (such as cProfile) that depend on the tuple of
+            # (<filename>, <definition line>, <function name>) being unique.
+            filename = '<decorator-gen-%d>' % (next(self._compile_count),)
+            try:
+                module = compile(code_src, filename, 'single')
+            except:
+                print('Error in generated code:', file=sys.stderr)
+                print(src, file=sys.stderr)
+                raise
+            for code in module.co_consts:
+                if (isinstance(code, types.CodeType) and
+                        code.co_name == code_name):
+                    break
+            if not self.unique_filenames:
+                self._code_cache[code_src] = code
+        # the name and the defaults are set by update, so the code only needs
+        # new globals with the builtins that exec would have added
+        evaldict.setdefault('__builtins__', __builtins__)
+        func = evaldict[name] = types.FunctionType(code, evaldict, name)
         if addsource:
             attrs['__source__'] = src
         self.update(func, **attrs)
@@ -335,6 +376,18 @@ def dispatch_on(*dispatch_args):
             raise NameError('Unknown dispatch arguments %s' % dispatch_str)
 
         typemap = {}
+        # implementations already resolved for the concrete types, keyed by
+        # weak references so the types can be freed
+        dispatch_cache = {}
+
+        def purge(dead):
+            """Drop the implementations cached for a type that was freed"""
+            for key in list(dispatch_cache):
+                if dead in key:
+                    dispatch_cache.pop(key, None)
+
+        # the ABC cache token, None while no ABC is registered
+        cache_token = [None]
 
         def vancestors(*types):
             """
@@ -376,6 +429,10 @@ def dispatch_on(*dispatch_args):
             def dec(f):
                 check(getfullargspec(f).args, operator.lt, ' in ' + f.__name__)
                 typemap[types] = f
+                dispatch_cache.clear()
+                if cache_token[0] is None and any(
+                        hasattr(t, '__abstractmethods__') for t in types):
+                    cache_token[0] = get_cache_token()
                 return f
             return dec
 
@@ -389,28 +446,44 @@ def dispatch_on(*dispatch_args):
                 lst.append(tuple(a.__name__ for a in anc))
             return lst
 
-        def _dispatch(dispatch_args, *args, **kw):
-            types = tuple(type(arg) for arg in dispatch_args)
-            try:  # fast path
-                f = typemap[types]
-            except KeyError:
-                pass
-            else:
-                return f(*args, **kw)
+        def resolve(types):
+            """
+            Find the implementation for a tuple of concrete types
+            """
+            f = typemap.get(types)
+            if f is not None:
+                return f
             combinations = itertools.product(*ancestors(*types))
             next(combinations)  # the first one has been already tried
             for types_ in combinations:
                 f = typemap.get(types_)
                 if f is not None:
-                    return f(*args, **kw)
+                    return f
+
+            # else the default implementation
+            return func
 
-            # else call the default implementation
-            return func(*args, **kw)
+        def _dispatch(dispatch_args, *args, **kw):
+            types = tuple(type(arg) for arg in dispatch_args)
+            if cache_token[0] is not None:
+                token = get_cache_token()
+                if cache_token[0] != token:
+                    # an ABC got a new virtual subclass
+                    dispatch_cache.clear()
+                    cache_token[0] = token
+            try:  # fast path
+                f = dispatch_cache[tuple(map(weakref.ref, types))]
+            except KeyError:
+                f = resolve(types)
+                dispatch_cache[tuple(weakref.ref(t, purge)
+                                     for t in types)] = f
+            return f(*args, **kw)
 
         return FunctionMaker.create(
             func, 'return _f_(%s, %%(shortsignature)s)' % dispatch_str,
             dict(_f_=_dispatch), register=register, default=func,
-            typemap=typemap, vancestors=vancestors, ancestors=ancestors,
+            typemap=typemap, dispatch_cache=dispatch_cache,
+            vancestors=vancestors, ancestors=ancestors,
             dispatch_info=dispatch_info, __wrapped__=func)
 
     gen_func_dec.__name__ = 'dispatch_on' + dispatch_str
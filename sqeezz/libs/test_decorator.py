@@ -0,0 +1,106 @@
+# coding=utf-8
+from unittest import TestCase
+
+from sqeezz.libs.decorator import decorate, dispatch_on
+
+
+def _caller(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+class TestFunctionMaker(TestCase):
+    def test_shared_code(self):
+        def first(arg1, arg2=None):
+            return 'first', arg1, arg2
+
+        def second(arg1, arg2=None):
+            return 'second', arg1, arg2
+
+        decorated_first = decorate(first, _caller)
+        decorated_second = decorate(second, _caller)
+
+        self.assertIs(decorated_first.__code__, decorated_second.__code__)
+        self.assertEqual(decorated_first.__name__, 'first')
+        self.assertEqual(decorated_second.__name__, 'second')
+        self.assertTupleEqual(decorated_first(1), ('first', 1, None))
+        self.assertTupleEqual(decorated_second(1, 2), ('second', 1, 2))
+
+    def test_name_in_body(self):
+        from sqeezz.libs.decorator import FunctionMaker
+
+        def count(number):
+            return number
+
+        maker = FunctionMaker(count)
+        recursive = maker.make(
+            'def %(name)s(%(signature)s):\n'
+            '    return %(name)s(number - 1) if number else "done"',
+            {})
+
+        self.assertEqual(recursive(3), 'done')
+        self.assertEqual(recursive.__code__.co_name, 'count')
+
+
+class TestDispatchOn(TestCase):
+    def test_cache(self):
+        @dispatch_on('obj', 'other')
+        def describe(obj, other):
+            return 'default'
+
+        @describe.register(int, int)
+        def describe_int(obj, other):
+            return 'int'
+
+        self.assertEqual(describe(1, 2), 'int')
+        self.assertEqual(describe(3, 4), 'int')
+        self.assertEqual(describe('a', 2), 'default')
+        self.assertItemsEqual(describe.dispatch_cache.values(),
+                              [describe_int, describe.default])
+
+        @describe.register(str, int)
+        def describe_str(obj, other):
+            return 'str'
+
+        self.assertEqual(len(describe.dispatch_cache), 0)
+        self.assertEqual(describe('a', 2), 'str')
+
+    def test_abc(self):
+        import abc
+
+        class Base(object):
+            __metaclass__ = abc.ABCMeta
+
+        class Virtual(object):
+            pass
+
+        @dispatch_on('obj')
+        def describe(obj):
+            return 'default'
+
+        @describe.register(Base)
+        def describe_base(obj):
+            return 'base'
+
+        self.assertEqual(describe(Virtual()), 'default')
+
+        Base.register(Virtual)
+
+        self.assertEqual(describe(Virtual()), 'base')
+
+    def test_weak_types(self):
+        import gc
+
+        @dispatch_on('obj')
+        def describe(obj):
+            return 'default'
+
+        class Temporary(object):
+            pass
+
+        describe(Temporary())
+        self.assertEqual(len(describe.dispatch_cache), 1)
+
+        del Temporary
+        gc.collect()
+
+        self.assertEqual(len(describe.dispatch_cache), 0)
@@ -1,4 +1,14 @@
+import os
+import shutil
+import tempfile
+from threading import Event, Thread
 from unittest import TestCase
+from weakref import WeakSet
+
+import sqeezz
+from sqeezz import (Deferred, Imported, Injected, ModuleLoader, Scoped,
+                    Singleton, Sqeezz, Transient, _Inject, _InjectionPlan,
+                    _missing, inject, register)
 
 
 class TestSqeezz(TestCase):
@@ -16,3 +26,556 @@ class TestSqeezz(TestCase):
 
     def test_register(self):
         self.fail()
+
+
+class TestInjectionPlan(TestCase):
+    def test_targets(self):
+        def test_func(arg1, arg2=1, PlanFoo=Injected, mod=Imported('os')):
+            pass
+
+        plan = _InjectionPlan(test_func)
+
+        self.assertTupleEqual(plan.names, ('arg1', 'arg2', 'PlanFoo', 'mod'))
+        self.assertListEqual([t[:2] for t in plan.targets],
+                             [(2, 'PlanFoo'), (3, 'mod')])
+
+    def test_inject(self):
+        Sqeezz.register(PlanFoo='foo')
+
+        @inject
+        def test_func(arg1, PlanFoo=Injected):
+            return arg1, PlanFoo
+
+        self.assertTupleEqual(test_func(1), (1, 'foo'))
+        self.assertTupleEqual(test_func(1, 'bar'), (1, 'bar'))
+
+    def test_inject_passed(self):
+        Sqeezz.register(PlanDb='the-db')
+
+        def test_func(PlanDb, sep=None):
+            # Sqeezz.inject calls what the function returns.
+            return lambda: (PlanDb, sep)
+
+        self.assertTupleEqual(Sqeezz.inject(test_func, PlanDb=Injected),
+                              ('the-db', None))
+        self.assertTupleEqual(
+            Sqeezz.inject(test_func, Injected, Imported('os:sep')),
+            ('the-db', '/'))
+
+    def test_generation(self):
+        Sqeezz.register(PlanBar='foo')
+
+        @inject
+        def test_func(PlanBar=Injected):
+            return PlanBar
+
+        self.assertEqual(test_func(), 'foo')
+
+        Sqeezz.register(PlanBar='bar')
+
+        self.assertEqual(test_func(), 'bar')
+
+    def test_wrap(self):
+        Sqeezz.register(PlanWrap='foo')
+
+        def test_func(arg1, PlanWrap=Injected, sep=Imported('os:sep'), *args):
+            return arg1, PlanWrap, sep, args
+
+        wrapper = _InjectionPlan(test_func).wrap()
+
+        self.assertIs(wrapper.__wrapped__, test_func)
+        self.assertTupleEqual(wrapper(1), (1, 'foo', '/', ()))
+        self.assertTupleEqual(wrapper(1, 2, 3, 4), (1, 2, 3, (4, )))
+        self.assertRaises(KeyError, _InjectionPlan(
+            lambda PlanMissing=Injected: None).wrap())
+        self.assertRaises(NameError, _InjectionPlan(
+            lambda _plan_=Injected: None).wrap)
+
+
+class TestLifetimes(TestCase):
+    def test_singleton(self):
+        Sqeezz.register(LifeSingleton=Singleton(object))
+
+        @inject
+        def test_func(LifeSingleton=Injected):
+            return LifeSingleton
+
+        self.assertIs(test_func(), test_func())
+
+    def test_transient(self):
+        Sqeezz.register(LifeTransient=Transient(object))
+
+        @inject
+        def test_func(LifeTransient=Injected):
+            return LifeTransient
+
+        self.assertIsNot(test_func(), test_func())
+
+    def test_scoped(self):
+        Sqeezz.register(LifeScoped=Scoped(object))
+
+        @inject
+        def test_func(LifeScoped=Injected):
+            return LifeScoped
+
+        with Sqeezz.scope():
+            first = test_func()
+            self.assertIs(first, test_func())
+
+        with Sqeezz.scope():
+            self.assertIsNot(first, test_func())
+
+        self.assertRaises(RuntimeError, test_func)
+
+    def test_register_decorator(self):
+        @register('LifeDecorated', lifetime=Singleton)
+        class Decorated(object):
+            pass
+
+        @inject
+        def test_func(LifeDecorated=Injected):
+            return LifeDecorated
+
+        self.assertIsInstance(test_func(), Decorated)
+        self.assertIs(test_func(), test_func())
+
+
+class TestDeferred(TestCase):
+    def test_deferred(self):
+        started = Event()
+
+        def first():
+            started.set()
+            return 'first'
+
+        def second():
+            # Only finishes when the first one was started at the same time.
+            started.wait(5)
+            return started.is_set()
+
+        Sqeezz.register(LifeFirst=Deferred(first),
+                        LifeSecond=Deferred(second))
+
+        @inject
+        def test_func(LifeSecond=Injected, LifeFirst=Injected):
+            return LifeSecond, LifeFirst
+
+        self.assertTupleEqual(test_func(), (True, 'first'))
+
+    def test_deferred_error(self):
+        def fail():
+            raise ValueError('failed')
+
+        deferred = Deferred(fail)
+
+        self.assertRaises(ValueError, deferred.get)
+        self.assertRaises(ValueError, deferred.get)
+
+    def test_deferred_retry(self):
+        calls = []
+
+        def flaky():
+            calls.append(None)
+
+            if len(calls) == 1:
+                raise ValueError('failed')
+
+            return len(calls)
+
+        deferred = Deferred(flaky)
+
+        self.assertRaises(ValueError, deferred.get)
+        self.assertFalse(deferred.built)
+        self.assertEqual(deferred.get(), 2)
+        self.assertTrue(deferred.built)
+        self.assertEqual(deferred.get(), 2)
+
+    def test_deferred_profile(self):
+        class Service(object):
+            def __init__(self, DeferredDep=Injected):
+                self.dep = DeferredDep
+
+        Sqeezz.register(DeferredDep='default')
+
+        with Sqeezz.using_profile('deferred'):
+            Sqeezz.register(DeferredDep='deferred')
+
+        Sqeezz.register(DeferredService=Deferred(Service),
+                        DeferredTransient=Transient(Service))
+
+        @inject
+        def test_func(DeferredService=Injected, DeferredTransient=Injected):
+            return DeferredService.dep, DeferredTransient.dep
+
+        with Sqeezz.using_profile('deferred'):
+            self.assertTupleEqual(test_func(), ('deferred', 'deferred'))
+
+    def test_deferred_profile_inject(self):
+        @inject
+        def make_color(DeferredColor=Injected):
+            return DeferredColor
+
+        Sqeezz.register(DeferredColor='default')
+
+        with Sqeezz.using_profile('deferred'):
+            Sqeezz.register(DeferredColor='deferred')
+
+        deferred = Deferred(make_color)
+
+        with Sqeezz.using_profile('deferred'):
+            self.assertEqual(deferred.get(), 'deferred')
+
+    def test_deferred_profile_chain(self):
+        def paint(DeferredPaint=Injected):
+            return DeferredPaint
+
+        def outer(DeferredInner=Injected):
+            return DeferredInner
+
+        Sqeezz.register(DeferredPaint='default',
+                        DeferredInner=Transient(paint))
+
+        with Sqeezz.using_profile('deferred'):
+            Sqeezz.register(DeferredPaint='deferred')
+
+        deferred = Deferred(outer)
+
+        with Sqeezz.using_profile('deferred'):
+            self.assertEqual(deferred.get(), 'deferred')
+            self.assertEqual(Transient(outer).get(), 'deferred')
+
+
+class TestDependencies(TestCase):
+    def test_recipe(self):
+        class Service(object):
+            @inject
+            def __init__(self, DepA=Injected, DepB=Injected, name=None):
+                pass
+
+        self.assertTupleEqual(Transient(Service).dependencies,
+                              ('DepA', 'DepB'))
+        self.assertTupleEqual(Transient(Service).wiring, ())
+        self.assertTupleEqual(Transient(Service, 1).dependencies, ('DepB',))
+        self.assertTupleEqual(Transient(Service, DepB=2).dependencies,
+                              ('DepA',))
+        self.assertTupleEqual(Transient(object).dependencies, ())
+
+    def test_classic_class(self):
+        class Classic:
+            pass
+
+        singleton = Singleton(Classic)
+
+        self.assertTupleEqual(singleton.dependencies, ())
+        self.assertIsInstance(singleton.get(), Classic)
+
+    def test_wiring(self):
+        class Database(object):
+            def __init__(self, DepUrl=Injected):
+                self.url = DepUrl
+
+        class Repository(object):
+            @inject
+            def __init__(self, DepDatabase=Injected):
+                self.database = DepDatabase
+
+        Sqeezz.register(DepUrl='sqlite://',
+                        DepDatabase=Singleton(Database),
+                        DepRepository=Transient(Repository))
+
+        @inject
+        def test_func(DepRepository=Injected):
+            return DepRepository
+
+        first, second = test_func(), test_func()
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.database, second.database)
+        self.assertEqual(first.database.url, 'sqlite://')
+
+    def test_unregistered(self):
+        class Service(object):
+            def __init__(self, DepUnregistered=Injected):
+                pass
+
+        self.assertRaises(KeyError, Transient(Service).get)
+
+    def test_cycle(self):
+        def first(DepSecond=Injected):
+            return DepSecond
+
+        def second(DepFirst=Injected):
+            return DepFirst
+
+        # Nothing is registered when the providers depend on each other.
+        self.assertRaises(RuntimeError, Sqeezz.register,
+                          DepFirst=Transient(first),
+                          DepSecond=Transient(second))
+        self.assertRaises(RuntimeError, Sqeezz.register,
+                          DepCycle=Transient(lambda DepCycle=Injected: None))
+
+        @inject
+        def test_func(DepFirst=Injected):
+            return DepFirst
+
+        self.assertRaises(KeyError, test_func)
+
+
+class TestFreeze(TestCase):
+    def setUp(self):
+        # Only the functions decorated by the test are frozen.
+        self.plans = sqeezz._plans
+        sqeezz._plans = WeakSet()
+
+    def tearDown(self):
+        Sqeezz.freeze(False)
+        sqeezz._plans = self.plans
+
+    def test_freeze(self):
+        Sqeezz.register(FreezeFoo='foo')
+
+        @inject
+        def test_func(FreezeFoo=Injected):
+            return FreezeFoo
+
+        Sqeezz.freeze()
+
+        self.assertEqual(test_func(), 'foo')
+        self.assertRaises(RuntimeError, Sqeezz.register, FreezeBar='bar')
+
+        Sqeezz.freeze(False)
+        Sqeezz.register(FreezeBar='bar')
+
+    def test_freeze_deferred(self):
+        started = Event()
+
+        def make_color(FreezeColor=Injected):
+            started.set()
+            return FreezeColor
+
+        Sqeezz.register(FreezeColor='default')
+
+        with Sqeezz.using_profile('freeze'):
+            Sqeezz.register(FreezeColor='freeze')
+
+        Sqeezz.register(FreezeDeferred=Deferred(make_color))
+
+        @inject
+        def test_func(FreezeDeferred=Injected):
+            return FreezeDeferred
+
+        Sqeezz.freeze()
+
+        # Nothing is built until the first call, with the profile it uses.
+        self.assertFalse(started.wait(0.05))
+        self.assertEqual(test_func(), 'default')
+
+    def test_unresolved(self):
+        @inject
+        def test_func(FreezeMissing=Injected):
+            return FreezeMissing
+
+        with self.assertRaises(LookupError) as context:
+            Sqeezz.freeze()
+
+        self.assertIn('test_func(FreezeMissing)', str(context.exception))
+
+    def test_inject_after_freeze(self):
+        Sqeezz.register(FreezeLate='late')
+        Sqeezz.freeze()
+
+        def test_func(FreezeLate=Injected, FreezeUnknown=Injected):
+            pass
+
+        self.assertRaises(LookupError, inject, test_func)
+
+
+class TestImported(TestCase):
+    def test_create(self):
+        imported = Imported('os.path:join')
+
+        self.assertIs(imported.create(), os.path.join)
+        self.assertIs(imported.create(), os.path.join)
+        self.assertIs(Imported('os.path').create(), os.path)
+
+    def test_invalidate(self):
+        imported = Imported('os:sep')
+        imported.create()
+        imported.invalidate()
+
+        self.assertIs(imported._value, _missing)
+        self.assertEqual(imported.create(), os.sep)
+
+
+class TestModuleLoader(TestCase):
+    def test_register_lazy(self):
+        ModuleLoader.register_lazy('json')
+
+        @inject
+        def test_func(json=Injected):
+            return json
+
+        self.assertIn('json', ModuleLoader.unloaded())
+        self.assertTrue(hasattr(test_func(), 'dumps'))
+        self.assertNotIn('json', ModuleLoader.unloaded())
+
+    def test_register_new_lazy(self):
+        root = tempfile.mkdtemp()
+        cwd = os.getcwd()
+
+        try:
+            with open(os.path.join(root, 'lazy_new.py'), 'w') as module:
+                module.write('VALUE = 1\n')
+
+            os.chdir(root)
+            ModuleLoader.register_new_lazy('lazy_new')
+            os.chdir(cwd)
+
+            @inject
+            def test_func(lazy_new=Injected):
+                return lazy_new
+
+            self.assertEqual(test_func().VALUE, 1)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(root)
+
+    def test_register_lazy_error(self):
+        with self.assertRaises(ValueError):
+            with Sqeezz.bulk():
+                ModuleLoader.register_lazy('lazy_failed')
+                raise ValueError
+
+        self.assertNotIn('lazy_failed', ModuleLoader.unloaded())
+
+
+class TestBulk(TestCase):
+    def test_bulk(self):
+        registry = _Inject().instance()
+        generation = registry.generation
+
+        with Sqeezz.bulk():
+            for i in xrange(10):
+                Sqeezz.register(**{'BulkName{}'.format(i): i})
+
+            with Sqeezz.bulk():
+                Sqeezz.register(BulkNested='nested')
+
+            self.assertRaises(KeyError, registry.provider, 'BulkName0')
+
+        self.assertEqual(registry.generation, generation + 1)
+        self.assertEqual(registry.provider('BulkName9'), 9)
+        self.assertEqual(registry.provider('BulkNested'), 'nested')
+
+    def test_conflict(self):
+        registry = _Inject().instance()
+
+        with self.assertRaises(RuntimeError):
+            with Sqeezz.bulk():
+                Sqeezz.register(BulkConflict=1, BulkOther=2)
+                Sqeezz.register(BulkConflict=3)
+
+        with self.assertRaises(ValueError):
+            with Sqeezz.bulk():
+                Sqeezz.register(BulkError=1)
+                raise ValueError
+
+        self.assertRaises(KeyError, registry.provider, 'BulkOther')
+        self.assertRaises(KeyError, registry.provider, 'BulkError')
+
+    def test_module_loader(self):
+        registry = _Inject().instance()
+        generation = registry.generation
+
+        ModuleLoader.register_lazy('csv', 'glob', 'shlex')
+
+        self.assertEqual(registry.generation, generation + 1)
+
+
+class TestMetrics(TestCase):
+    def test_instrument(self):
+        events = []
+        Sqeezz.register(MetricsFoo=Transient(object))
+
+        @inject
+        def test_func(MetricsFoo=Injected):
+            return MetricsFoo
+
+        Sqeezz.metrics(reset=True)
+        Sqeezz.instrument(True, lambda *event: events.append(event))
+
+        try:
+            test_func()
+            test_func()
+        finally:
+            Sqeezz.instrument(False)
+
+        test_func()
+        metrics = Sqeezz.metrics(reset=True)
+
+        self.assertEqual(metrics['resolutions'], {'MetricsFoo': 2})
+        self.assertEqual(metrics['constructions'], {'object': 2})
+        self.assertEqual(metrics['cache_misses'], 1)
+        self.assertEqual(metrics['cache_hits'], 1)
+        self.assertIn('call_seconds', metrics)
+        self.assertIn(('resolutions', 'MetricsFoo', 1), events)
+
+
+class TestRegistryThreads(TestCase):
+    def test_register_while_injecting(self):
+        errors = []
+        Sqeezz.register(ThreadFoo='foo')
+
+        @inject
+        def test_func(ThreadFoo=Injected):
+            return ThreadFoo
+
+        def injecting():
+            try:
+                for i in xrange(2000):
+                    test_func()
+                    list(Sqeezz.profiles())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=injecting) for i in xrange(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for i in xrange(200):
+            Sqeezz.register(**{'ThreadFoo{}'.format(i): i})
+
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(errors, [])
+        self.assertEqual(test_func(), 'foo')
+
+
+class TestUsingProfile(TestCase):
+    def test_using_profile(self):
+        Sqeezz.register(ContextFoo='default')
+
+        with Sqeezz.using_profile('context'):
+            Sqeezz.register(ContextFoo='context')
+            self.assertEqual(Sqeezz.current_profile(), 'context')
+
+        @inject
+        def test_func(ContextFoo=Injected):
+            return ContextFoo
+
+        results = []
+
+        def other_thread():
+            results.append(test_func())
+
+        with Sqeezz.using_profile('context'):
+            self.assertEqual(test_func(), 'context')
+
+            thread = Thread(target=other_thread)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(test_func(), 'default')
+        self.assertListEqual(results, ['default'])
@@ -1,4 +1,7 @@
 # coding=utf-8
+import mmap
+import os
+from functools import partial
 from imp import load_source
 from importlib import import_module
 from inspect import getargspec, isclass
@@ -20,6 +23,8 @@ class ClassUtils(object):
 
 
 class FuncUtils(object):
+    __slots__ = ()
+
     @staticmethod
     def remove_invalid_kwargs(func, args, kwargs):
         """
@@ -67,6 +72,92 @@ class FuncUtils(object):
         return getargspec(func)
 
 
+class FileUtils(object):
+    # Bytes read at a time by chunks.
+    chunk_size = 1 << 16
+
+    @staticmethod
+    def chunks(path, size=None, open_file=None):
+        """
+        Reads a file into one reusable buffer, so each chunk is only valid
+        until the next one is read. A file-like object without readinto
+        yields the strings it reads instead.
+
+        :param path: file path
+        :param size: bytes read at a time (default: FileUtils.chunk_size)
+        :param open_file: callable that returns the file-like object to read
+                          in place of the path (default: None)
+        :return: generator of memoryview chunks
+        """
+        size = size or FileUtils.chunk_size
+        file_obj = open(path, 'rb', 0) if open_file is None else open_file()
+
+        try:
+            if not hasattr(file_obj, 'readinto'):
+                for chunk in iter(partial(file_obj.read, size), ''):
+                    yield chunk
+
+                return
+
+            data = bytearray(size)
+            view = memoryview(data)
+
+            while True:
+                count = file_obj.readinto(data)
+
+                if not count:
+                    break
+
+                yield view[:count]
+        finally:
+            file_obj.close()
+
+    @staticmethod
+    def map(path):
+        """
+        A wrapper for the mmap module that maps a file for reading.
+
+        :param path: file path
+        :return: MappedFile context manager
+        """
+        return MappedFile(path)
+
+
+class MappedFile(object):
+    """
+    Maps a file for reading with the 'with' statement, which returns a
+    memoryview of the file or a buffer when mmap doesn't support memoryview.
+    """
+    def __init__(self, path):
+        self.__path = path
+        self.__file = None
+        self.__map = None
+
+    def __enter__(self):
+        self.__file = open(self.__path, 'rb')
+
+        if not os.fstat(self.__file.fileno()).st_size:
+            # An empty file can't be mapped.
+            return memoryview(b'')
+
+        self.__map = mmap.mmap(self.__file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+
+        try:
+            return memoryview(self.__map)
+        except TypeError:
+            return buffer(self.__map)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if self.__map is not None:
+                self.__map.close()
+        finally:
+            self.__file.close()
+            self.__map = None
+            self.__file = None
+
+
 class ImportUtils(object):
     @staticmethod
     def import_module(name, package=None):
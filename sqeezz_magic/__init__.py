@@ -2,29 +2,43 @@
 
 
 class StringConcat(object):
+    # Strings shorter than this are joined together once there are enough of
+    # them at the end of the buffer.
+    small_chunk = 256
+    small_chunks = 64
+
     def __init__(self, value=None):
         self.__buffer = []
+        self.__length = 0
+        self.__small = 0
 
         if value is not None and isinstance(value, basestring):
-            self.__buffer.append(value)
+            self.write(value)
 
     def __add__(self, other):
         if not isinstance(other, basestring):
             other = unicode(other)
 
-        self.__buffer.extend(other)
+        self.write(other)
 
         return self
 
+    def __len__(self):
+        return self.__length
+
     def __repr__(self):
         return repr(''.join(self.__buffer))
 
     def __sub__(self, other):
-        try:
-            self.__buffer.remove(other)
-        except ValueError as e:
-            if e.message != 'list.remove(x): x not in list':
-                raise
+        if not isinstance(other, basestring):
+            other = unicode(other)
+
+        value = ''.join(self.__buffer)
+        index = value.find(other) if other else -1
+
+        if index != -1:
+            self.clear()
+            self.write(value[:index] + value[index + len(other):])
 
         return self
 
@@ -33,5 +47,56 @@ class StringConcat(object):
 
     def clear(self):
         self.__buffer = []
+        self.__length = 0
+        self.__small = 0
 
         return self
+
+    def iter_chunks(self):
+        """
+        Iterate over the buffered strings without joining them.
+
+        :return: iterator of strings
+        """
+        return iter(self.__buffer[:])
+
+    def write(self, value):
+        """
+        Append a string to the buffer.
+
+        :param value: string
+        :return: None
+        """
+        if not value:
+            return
+
+        self.__buffer.append(value)
+        self.__length += len(value)
+
+        if len(value) < self.small_chunk:
+            self.__small += 1
+
+            if self.__small >= self.small_chunks:
+                self.__coalesce()
+        else:
+            self.__small = 0
+
+    def write_to(self, file_obj):
+        """
+        Write the buffered strings to a file-like object one at a time.
+
+        :param file_obj: file-like object with a write method
+        :return: number of characters written
+        """
+        for chunk in self.__buffer:
+            file_obj.write(chunk)
+
+        return self.__length
+
+    def __coalesce(self):
+        """
+        Private method that joins the small strings at the end of the buffer.
+        """
+        small = self.__small
+        self.__buffer[-small:] = [''.join(self.__buffer[-small:])]
+        self.__small = 0
@@ -1,9 +1,296 @@
 # coding=utf-8
+import mmap
 import os
+import stat
+import sys
+from Queue import Empty, Full, Queue
+from collections import deque
+from functools import partial
 from glob import iglob
+from threading import Event, Lock, Thread
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+class _DirEntry(object):
+    """
+    Used in place of os.scandir entries when scandir is not installed, the
+    results of stat are cached like the entries of scandir.
+    """
+    __slots__ = ('name', 'path', '__lstat', '__stat')
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.__lstat = None
+        self.__stat = None
+
+    def __repr__(self):
+        return '<_DirEntry {!r}>'.format(self.name)
+
+    def inode(self):
+        return self.stat(follow_symlinks=False).st_ino
+
+    def is_dir(self, follow_symlinks=True):
+        return self.__is_mode(stat.S_ISDIR, follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self.__is_mode(stat.S_ISREG, follow_symlinks)
+
+    def is_symlink(self):
+        return self.__is_mode(stat.S_ISLNK, False)
+
+    def stat(self, follow_symlinks=True):
+        if self.__lstat is None:
+            self.__lstat = os.lstat(self.path)
+
+        if not follow_symlinks or not stat.S_ISLNK(self.__lstat.st_mode):
+            return self.__lstat
+
+        if self.__stat is None:
+            self.__stat = os.stat(self.path)
+
+        return self.__stat
+
+    def __is_mode(self, test, follow_symlinks):
+        try:
+            return test(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+
+def _scandir(path):
+    """
+    Private function that lists a directory with scandir when it is installed.
+
+    :param path: directory path
+    :return: iterable of directory entries
+    """
+    if scandir is not None:
+        return scandir(path)
+
+    return [_DirEntry(path, name) for name in os.listdir(path)]
+
+
+def _list_dir(top):
+    """
+    Private function that splits the entries of a directory into the
+    directories and the files.
+
+    :param top: directory path
+    :return: tuple of the directories, the files, and the OSError or None
+    """
+    dirs, files = [], []
+
+    try:
+        for entry in _scandir(top):
+            if entry.is_dir():
+                dirs.append(entry)
+            else:
+                files.append(entry)
+    except OSError as e:
+        return None, None, e
+
+    return dirs, files, None
+
+
+class _Failure(object):
+    """
+    An exception raised in a worker thread, it is raised again by the thread
+    that walks the directories.
+    """
+    def __init__(self):
+        self.exc_info = sys.exc_info()
+
+    def throw(self):
+        exc_type, exc_val, exc_tb = self.exc_info
+        raise exc_type, exc_val, exc_tb
+
+
+class _Listing(object):
+    """
+    A directory that is listed by a worker thread once it is submitted, or by
+    the walking thread when it is reached first.
+    """
+    def __init__(self, path, level):
+        self.path = path
+        self.level = level
+        self.__done = None
+        self.__result = None
+
+    def __call__(self):
+        try:
+            self.__result = _list_dir(self.path)
+        except BaseException:
+            self.__result = _Failure()
+        finally:
+            if self.__done is not None:
+                self.__done.set()
+
+    def result(self):
+        """
+        Wait for the directory to be listed, an exception raised while it was
+        listed is raised again.
+
+        :return: tuple of the directories, the files, and the OSError or None
+        """
+        if self.__done is not None:
+            self.__done.wait()
+
+        if isinstance(self.__result, _Failure):
+            self.__result.throw()
+
+        return self.__result
+
+    def submit(self, workers):
+        """
+        Give the directory to the workers to list.
+
+        :param workers: _Workers
+        :return: None
+        """
+        self.__done = Event()
+        workers.submit(self)
+
+    @property
+    def submitted(self):
+        return self.__done is not None
+
+
+class _Listings(object):
+    """
+    The directories of an ordered walk in the order they are walked, at most
+    `size` of them are listed ahead of the walk (0 is no limit).
+    """
+    def __init__(self, workers, size=0):
+        self.__workers = workers
+        self.__size = size
+        self.__ahead = 0
+        # Every directory that is not walked yet, and the ones of them that
+        # are not submitted, both in the order they are walked.
+        self.__waiting = deque()
+        self.__pending = deque()
+
+    def add(self, paths, level):
+        """
+        Add the subdirectories of the directory that is being walked, they
+        are walked before the directories that were added earlier.
+
+        :param paths: list of directory paths
+        :param level: level of the subdirectories
+        :return: None
+        """
+        listings = [_Listing(path, level) for path in reversed(paths)]
+        self.__waiting.extendleft(listings)
+        self.__pending.extendleft(listings)
+        self.__submit()
+
+    def next(self):
+        """
+        Take the next directory of the walk, it is listed by this thread
+        when it was not submitted yet.
+
+        :return: _Listing
+        """
+        listing = self.__waiting.popleft()
+
+        if listing.submitted:
+            self.__ahead -= 1
+            self.__submit()
+        else:
+            self.__pending.popleft()
+            listing()
+
+        return listing
+
+    def __submit(self):
+        """
+        Private method that gives the next directories of the walk to the
+        workers until `size` of them are listed ahead.
+        """
+        pending = self.__pending
+
+        while pending and (not self.__size or self.__ahead < self.__size):
+            pending.popleft().submit(self.__workers)
+            self.__ahead += 1
+
+
+class _Workers(object):
+    """
+    Threads that run the callables put in the task queue.
+    """
+    def __init__(self, count):
+        self.__tasks = Queue()
+        self.__threads = []
+
+        for i in xrange(count):
+            thread = Thread(target=self.__work)
+            thread.daemon = True
+            thread.start()
+            self.__threads.append(thread)
+
+    def __work(self):
+        while True:
+            task = self.__tasks.get()
+
+            if task is None:
+                break
+
+            task()
+
+    def close(self):
+        for thread in self.__threads:
+            self.__tasks.put(None)
+
+    def submit(self, task):
+        self.__tasks.put(task)
+
+
+class _MappedFile(object):
+    """
+    Maps a file for reading with the 'with' statement, which returns a
+    memoryview of the file or a buffer when mmap doesn't support memoryview.
+    """
+    def __init__(self, path):
+        self.__path = path
+        self.__file = None
+        self.__map = None
+
+    def __enter__(self):
+        self.__file = open(self.__path, 'rb')
+
+        if not os.fstat(self.__file.fileno()).st_size:
+            # An empty file can't be mapped.
+            return memoryview(b'')
+
+        self.__map = mmap.mmap(self.__file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+
+        try:
+            return memoryview(self.__map)
+        except TypeError:
+            return buffer(self.__map)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if self.__map is not None:
+                self.__map.close()
+        finally:
+            self.__file.close()
+            self.__map = None
+            self.__file = None
 
 
 class File(object):
+    # Bytes read at a time by chunks.
+    chunk_size = 1 << 16
+
     def __init__(self, _file):
         self.__file = _file
         self.__mode = 'r'
@@ -23,6 +310,28 @@ class File(object):
     def buffering(self, buffering=-1):
         self.__buffering = buffering
 
+    def chunks(self, size=None):
+        data = bytearray(size or self.chunk_size)
+        view = memoryview(data)
+
+        with open(self.__file, 'rb', 0) as file_obj:
+            while True:
+                count = file_obj.readinto(data)
+
+                if not count:
+                    break
+
+                yield view[:count]
+
+    def lines(self, buffering=None):
+        if buffering is None:
+            buffering = self.__buffering
+
+        return open(self.__file, self.__mode, buffering)
+
+    def mmap(self):
+        return _MappedFile(self.__file)
+
     def mode(self, mode='r'):
         self.__mode = mode
 
@@ -30,51 +339,82 @@ class File(object):
 
 
 class Path(object):
-    def __init__(self, path=None):
-        self.__drive = u''
-        self.__file = None
-        self.__path = []
+    """
+    An immutable path, the normalized string is built once when it is created.
+    """
+    __slots__ = ('__drive', '__entry', '__file', '__path', '__string')
+
+    def __init__(self, path=None, file_name=None, probe=True, entry=None):
+        """
+        Split the path into the drive, the directories, and the file.
+
+        :param path: string or Path
+        :param file_name: file name that replaces the file of the path
+        :param probe: check the file system to know if the path is a file,
+                      without it the path is always a directory
+        :param entry: directory entry from scandir that is used in place of
+                      checking the file system
+        """
+        drive, directories, file_name_ = u'', (), None
+
+        if isinstance(path, Path):
+            drive, directories, file_name_ = (
+                path.__drive, path.__path, path.__file)
+
+            if entry is None and file_name is None:
+                entry = path.__entry
+        elif isinstance(path, (str, unicode)):
+            drive, directories, file_name_ = self.__split(
+                path, probe and entry is None)
+
+        if isinstance(file_name, (str, unicode)):
+            file_name_ = file_name
 
-        self.set(path)
+        self.__entry = entry
+        self.__drive = drive
+        self.__path = directories
+        self.__file = file_name_
+        self.__string = self.__build_string(drive, directories, file_name_)
 
     def __add__(self, other):
         if type(other) is Path:
             if (unicode(other).startswith('/') or
                     unicode(other).startswith('\\')):
                 other = os.path.join(*other[1:])
-            obj = Path(os.path.join(unicode(self), unicode(other)))
+            obj = Path(os.path.join(self.__string, unicode(other)))
         else:
-            obj = unicode(self) + other
+            obj = self.__string + other
 
         return obj
 
     def __call__(self, *args, **kwargs):
-        return unicode(self)
+        return self.__string
 
     def __contains__(self, item):
         try:
-            iglob(os.path.join(str(self), item)).next()
+            iglob(os.path.join(self.__string, item)).next()
         except StopIteration:
             return False
 
         return True
 
     def __div__(self, other):
-        path = self.__add_path(other)
-
-        return Path(self.__build_path(path))
+        return Path(self.__build_path(self.__path + (other, )))
 
     def __eq__(self, other):
-        return self.__get_path == unicode(other)
+        return self.__string == unicode(other)
 
     def __getitem__(self, item):
         return self.__path_parts[item]
 
+    def __hash__(self):
+        return hash(self.__string)
+
     def __iter__(self):
         return iter(Walker(self))
 
     def __len__(self):
-        return len(unicode(self))
+        return len(self.__string)
 
     def __mul__(self, other):
         if self.__file is None:
@@ -83,35 +423,61 @@ class Path(object):
         if other[0] != '.':
             other = '.' + other
 
-        return Path('{}{}'.format(
-                os.path.splitext(unicode(self))[0], other))
+        return Path('{}{}'.format(os.path.splitext(self.__string)[0], other))
+
+    def __ne__(self, other):
+        return not self == other
 
     def __repr__(self):
-        return repr(self.__get_path)
+        return repr(self.__string)
 
     def __unicode__(self):
-        return unicode(self.__get_path)
+        return self.__string
 
     @staticmethod
     def __build_path(path):
         return os.path.normpath(os.path.join(*path))
 
-    def __add_path(self, directory):
-        path = self.__path[:]
+    @classmethod
+    def __build_string(cls, drive, directories, file_name):
+        path = ''
 
-        path.append(directory)
-        return path
+        if directories:
+            path = cls.__build_path(directories)
+
+        if file_name is not None:
+            path = os.path.join(path, file_name)
+
+        return unicode(drive + path)
+
+    @staticmethod
+    def __split(path, probe):
+        file_name = None
+        path = os.path.expanduser(os.path.expandvars(path))
+        path = os.path.normpath(path)
+
+        if probe and os.path.isfile(path):
+            path, file_name = os.path.split(path)
+
+        drive, path = os.path.splitdrive(path)
+        directories = []
+
+        while True:
+            head, tail = os.path.split(path)
+
+            if tail:
+                directories.append(tail)
+            elif head == os.sep:
+                directories.append(head)
 
-    def __set_path(self, path):
-        head, tail = os.path.split(path)
+            if not (head and tail):
+                break
 
-        if tail:
-            self.__path.insert(0, tail)
-        elif head == os.sep:
-            self.__path.insert(0, head)
+            path = head
 
-        if head and tail:
-            self.__set_path(head)
+        directories.reverse()
+
+        return drive, tuple(directories), file_name
 
     def depth(self, depth=None):
         return Walker(self).depth(depth)
@@ -122,31 +488,23 @@ class Path(object):
     def on_error(self, on_error=None):
         return Walker(self).on_error(on_error)
 
-    def set(self, path, file_name=None):
-        if isinstance(path, Path):
-            path = unicode(path)
-
-        if isinstance(path, (str, unicode)):
-            path = os.path.expanduser(os.path.expandvars(path))
-            path = os.path.normpath(path)
-
-            if os.path.isfile(path):
-                path, self.__file = os.path.split(path)
+    def set(self, path=None, file_name=None, probe=True):
+        """
+        Create a new path, the path and file name default to the ones of this
+        path.
 
-            self.__drive, path = os.path.splitdrive(path)
-            self.__path = []
-            self.__set_path(path)
-
-        if file_name is not None:
-            self.file = file_name
-
-        return self
+        :param path: string or Path
+        :param file_name: file name
+        :param probe: check the file system to know if the path is a file
+        :return: Path
+        """
+        return Path(self if path is None else path, file_name, probe)
 
     def top_down(self, top_down=True):
         return Walker(self).top_down(top_down)
 
     def up(self, count=1):
-        path = self.__path[:]
+        path = list(self.__path)
 
         while count:
             if len(path) > 1:
@@ -160,43 +518,31 @@ class Path(object):
         return Path(path)
 
     def files(self, file_filter='*'):
-        for f in iglob(os.path.join(unicode(self), file_filter)):
+        for f in iglob(os.path.join(self.__string, file_filter)):
             if os.path.isfile(f):
                 yield Path(f)
 
     def dirs(self, dir_filter='*'):
-        for d in iglob(os.path.join(unicode(self), dir_filter)):
+        for d in iglob(os.path.join(self.__string, dir_filter)):
             if os.path.isdir(d):
                 yield Path(d)
 
     def existing_path(self):
-        path = Path(unicode(self))
-
-        while not path.exists() and unicode(path):
-            path = path.up()
+        path = self
 
-        if not unicode(path):
-            raise IOError('Invalid path, no valid parent directories.')
+        while not path.exists:
+            parent = path.up()
 
-        return path
-
-    @property
-    def __get_path(self):
-        path = ''
+            if not unicode(parent) or parent == path:
+                raise IOError('Invalid path, no valid parent directories.')
 
-        if len(self.__path):
-            path = self.__build_path(self.__path)
+            path = parent
 
-        if self.__file is not None:
-            path = os.path.join(path, self.__file)
-
-        return unicode(self.__drive + path)
+        return path
 
     @property
     def __path_parts(self):
-        path_parts = []
-
-        path_parts += self.__path[:]
+        path_parts = list(self.__path)
 
         if self.__drive and path_parts[0] == os.sep:
             path_parts[0] = self.__drive + path_parts[0]
@@ -206,19 +552,21 @@ class Path(object):
 
         return path_parts
 
+    @property
+    def entry(self):
+        return self.__entry
+
     @property
     def exists(self):
-        return os.path.exists(unicode(self))
+        if self.__entry is not None:
+            return True
+
+        return os.path.exists(self.__string)
 
     @property
     def file(self):
         return self.__file
 
-    @file.setter
-    def file(self, file_name):
-        if isinstance(file_name, (str, unicode)):
-            self.__file = file_name
-
     @property
     def file_extension(self):
         return self.file_split[1]
@@ -229,15 +577,21 @@ class Path(object):
 
     @property
     def full_path(self):
-        return unicode(self)
+        return self.__string
 
     @property
     def is_dir(self):
-        return os.path.isdir(unicode(self))
+        if self.__entry is not None:
+            return self.__entry.is_dir()
+
+        return os.path.isdir(self.__string)
 
     @property
     def is_file(self):
-        return os.path.isfile(unicode(self))
+        if self.__entry is not None:
+            return self.__entry.is_file()
+
+        return os.path.isfile(self.__string)
 
     @property
     def open(self):
@@ -246,6 +600,13 @@ class Path(object):
 
         return File(self.full_path)
 
+    @property
+    def stat(self):
+        if self.__entry is not None:
+            return self.__entry.stat()
+
+        return os.stat(self.__string)
+
 
 class Walker(object):
     def __init__(self, path=None):
@@ -253,6 +614,9 @@ class Walker(object):
         self.__follow_links = False
         self.__on_error = None
         self.__top_down = True
+        self.__workers = None
+        self.__ordered = True
+        self.__queue_size = 0
 
         self.__path = Path(path)
 
@@ -261,32 +625,184 @@ class Walker(object):
 
     @staticmethod
     def __dir_path(dirs):
-        for d in dirs:
-            yield Path(d)
+        for entry in dirs:
+            yield Path(entry.name, probe=False, entry=entry)
 
     @staticmethod
     def __file_path(files):
-        for f in files:
-            path = Path()
-            path.file = f
-            yield path
+        for entry in files:
+            yield Path(file_name=entry.name, entry=entry)
 
     def __walk(self):
         if not self.__path.exists:
-            raise StopIteration
+            return
+
+        if not self.__workers:
+            walk = self.__walk_dir(unicode(self.__path), 1)
+        elif self.__ordered:
+            walk = self.__walk_ordered(unicode(self.__path))
+        else:
+            walk = self.__walk_unordered(unicode(self.__path))
+
+        for item in walk:
+            yield item
+
+    def __children(self, dirs, level):
+        """
+        Private method that returns the directories to walk into and the
+        directories to list, neither are returned when it is too deep.
+        """
+        if self.__depth is not None and level > self.__depth:
+            return [], []
+
+        return [entry for entry in dirs
+                if self.__follow_links or not entry.is_symlink()], dirs
+
+    def __error(self, error):
+        if self.__on_error is not None:
+            self.__on_error(error)
+
+    def __walk_dir(self, top, level):
+        """
+        Private generator that walks a directory, the level of the starting
+        directory is one.
+        """
+        dirs, files, error = _list_dir(top)
+
+        if error is not None:
+            self.__error(error)
+            return
+
+        children, dirs = self.__children(dirs, level)
+
+        if self.__top_down:
+            yield (Path(top, probe=False), self.__dir_path(dirs),
+                   self.__file_path(files))
+
+        for entry in children:
+            for item in self.__walk_dir(entry.path, level + 1):
+                yield item
+
+        if not self.__top_down:
+            yield (Path(top, probe=False), self.__dir_path(dirs),
+                   self.__file_path(files))
+
+    def __walk_ordered(self, top):
+        """
+        Private generator that walks in the same order as __walk_dir, the
+        directories are listed by the workers before they are reached.
+        """
+        workers = _Workers(self.__workers)
+
+        try:
+            listings = _Listings(workers, self.__queue_size)
+            listings.add([top], 1)
+
+            for item in self.__walk_listing(listings):
+                yield item
+        finally:
+            workers.close()
+
+    def __walk_listing(self, listings):
+        listing = listings.next()
+        dirs, files, error = listing.result()
+
+        if error is not None:
+            self.__error(error)
+            return
+
+        children, dirs = self.__children(dirs, listing.level)
+        listings.add([entry.path for entry in children], listing.level + 1)
+
+        if self.__top_down:
+            yield (Path(listing.path, probe=False), self.__dir_path(dirs),
+                   self.__file_path(files))
+
+        for entry in children:
+            for item in self.__walk_listing(listings):
+                yield item
+
+        if not self.__top_down:
+            yield (Path(listing.path, probe=False), self.__dir_path(dirs),
+                   self.__file_path(files))
+
+    def __walk_unordered(self, top):
+        """
+        Private generator that yields the directories in the order the
+        workers list them, the results wait in a bounded queue.
+        """
+        workers = _Workers(self.__workers)
+        results = Queue(self.__queue_size)
+        stopped = Event()
+        lock = Lock()
+        pending = [1]
 
-        walker = os.walk(unicode(self.__path),
-                         self.__top_down,
-                         self.__on_error,
-                         self.__follow_links)
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except Full:
+                    pass
 
-        for path, dirs, files in walker:
-            children = path.replace(unicode(self.__path), '').split(os.sep)
+        def list_dir(path, level):
+            if stopped.is_set():
+                return
 
-            if self.__depth is not None and len(children) > self.__depth:
-                del dirs[:]
+            children = []
 
-            yield Path(path), self.__dir_path(dirs), self.__file_path(files)
+            try:
+                dirs, files, error = _list_dir(path)
+
+                if error is None:
+                    children, dirs = self.__children(dirs, level)
+
+                item = path, dirs, files, error
+            except BaseException:
+                item = _Failure()
+
+            with lock:
+                pending[0] += len(children)
+
+            for entry in children:
+                workers.submit(partial(list_dir, entry.path, level + 1))
+
+            put(item)
+
+            with lock:
+                pending[0] -= 1
+                done = not pending[0]
+
+            if done:
+                put(None)
+
+        try:
+            workers.submit(partial(list_dir, top, 1))
+
+            while True:
+                item = results.get()
+
+                if item is None:
+                    break
+                elif isinstance(item, _Failure):
+                    item.throw()
+
+                path, dirs, files, error = item
+
+                if error is not None:
+                    self.__error(error)
+                else:
+                    yield (Path(path, probe=False), self.__dir_path(dirs),
+                           self.__file_path(files))
+        finally:
+            stopped.set()
+            workers.close()
+
+            try:
+                while True:
+                    results.get_nowait()
+            except Empty:
+                pass
 
     def depth(self, depth=None):
         if not isinstance(depth, int):
@@ -306,6 +822,25 @@ class Walker(object):
 
         return self
 
+    def parallel(self, workers=4, ordered=True, queue_size=256):
+        """
+        List the directories with a pool of threads, the ordered walk yields
+        in the same order as the single threaded walk and the unordered walk
+        yields the directories as soon as they are listed.
+
+        :param workers: number of threads, None or 0 to use a single thread
+        :param ordered: keep the order of the single threaded walk
+        :param queue_size: most directories listed ahead of the walk, or
+                           waiting in a queue when it is unordered (0 is no
+                           limit)
+        :return: self
+        """
+        self.__workers = workers
+        self.__ordered = ordered and True
+        self.__queue_size = queue_size
+
+        return self
+
     def top_down(self, top_down=True):
         self.__top_down = top_down and True
 
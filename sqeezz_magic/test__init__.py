@@ -0,0 +1,40 @@
+# coding=utf-8
+import unittest
+from StringIO import StringIO
+from sqeezz_magic import StringConcat
+
+
+class TestStringConcat(unittest.TestCase):
+    def test_add(self):
+        string = StringConcat('foo')
+        string += 'bar'
+        string += 1
+
+        self.assertEqual(unicode(string), u'foobar1')
+        self.assertEqual(len(string), 7)
+
+    def test_sub(self):
+        string = StringConcat('foo') + 'bar' + 'foo'
+        string -= 'bar'
+
+        self.assertEqual(unicode(string), u'foofoo')
+
+        string -= 'baz'
+
+        self.assertEqual(unicode(string), u'foofoo')
+
+    def test_chunks(self):
+        string = StringConcat()
+
+        for i in xrange(StringConcat.small_chunks * 2):
+            string.write('x')
+
+        output = StringIO()
+
+        self.assertEqual(string.write_to(output), len(string))
+        self.assertEqual(output.getvalue(), 'x' * len(string))
+        self.assertLess(len(list(string.iter_chunks())), len(string))
+
+
+if __name__ == '__main__':
+    unittest.main()
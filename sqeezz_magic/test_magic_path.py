@@ -1,5 +1,11 @@
 # coding=utf-8
+import os
+import shutil
+import tempfile
+import time
 from unittest import TestCase
+from sqeezz_magic import magic_path
+from sqeezz_magic.magic_path import File, Path, Walker
 
 
 class TestPath(TestCase):
@@ -28,4 +34,127 @@ class TestPath(TestCase):
         self.fail()
 
     def test_existing_path(self):
-        self.fail()
+        root = tempfile.mkdtemp()
+
+        try:
+            self.assertEqual(
+                Path(os.path.join(root, 'foo', 'bar')).existing_path(), root)
+            self.assertRaises(IOError, Path(os.path.join(
+                'sqeezz_missing', 'foo')).existing_path)
+        finally:
+            shutil.rmtree(root)
+
+    def test_hash(self):
+        path = Path(os.path.join('foo', 'bar'))
+
+        self.assertEqual(path, Path(path))
+        self.assertIn(Path(os.path.join('foo', 'bar')), set([path]))
+        self.assertEqual(len(set([path, Path(unicode(path))])), 1)
+
+    def test_probe(self):
+        path = Path(__file__, probe=False)
+
+        self.assertIsNone(path.file)
+        self.assertEqual(Path(__file__).file, os.path.basename(__file__))
+        self.assertEqual(path.set(file_name='foo').file, 'foo')
+
+
+class TestFile(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, b'line 1\nline 2\n')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_read(self):
+        self.assertEqual(b''.join(chunk.tobytes()
+                                  for chunk in File(self.path).chunks(3)),
+                         b'line 1\nline 2\n')
+
+        with File(self.path).lines() as lines:
+            self.assertListEqual(list(lines), [b'line 1\n', b'line 2\n'])
+
+        with File(self.path).mmap() as view:
+            self.assertEqual(bytes(view[7:]), b'line 2\n')
+
+    def test_lines_mode(self):
+        # The file can't be read when it is opened to append.
+        with File(self.path).mode('a').lines() as lines:
+            self.assertRaises(IOError, list, lines)
+
+
+class TestWalker(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'a', 'b'))
+        open(os.path.join(self.root, 'a', 'file'), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def walk(self, walker):
+        return [(unicode(path)[len(self.root):],
+                 sorted(unicode(d) for d in dirs),
+                 sorted((unicode(f), f.is_file) for f in files))
+                for path, dirs, files in walker]
+
+    def test_walk(self):
+        self.assertListEqual(self.walk(Walker(self.root)), [
+            ('', ['a'], []),
+            (os.sep + 'a', ['b'], [('file', True)]),
+            (os.path.join(os.sep + 'a', 'b'), [], [])])
+
+    def test_depth(self):
+        self.assertListEqual(self.walk(Walker(self.root).depth(1)), [
+            ('', ['a'], []),
+            (os.sep + 'a', [], [('file', True)])])
+
+    def test_depth_bottom_up(self):
+        # The directories below the depth are not walked bottom up either.
+        self.assertListEqual(
+            self.walk(Walker(self.root).top_down(False).depth(1)), [
+                (os.sep + 'a', [], [('file', True)]),
+                ('', ['a'], [])])
+
+    def test_parallel(self):
+        walk = self.walk(Walker(self.root))
+
+        self.assertListEqual(
+            self.walk(Walker(self.root).parallel(2, queue_size=1)), walk)
+        self.assertListEqual(sorted(self.walk(
+            Walker(self.root).parallel(2, ordered=False))), sorted(walk))
+
+    def test_parallel_ahead(self):
+        for i in xrange(50):
+            os.mkdir(os.path.join(self.root, str(i)))
+
+        walk = self.walk(Walker(self.root))
+        listed = []
+        list_dir = magic_path._list_dir
+
+        def counting(top):
+            listed.append(top)
+            return list_dir(top)
+
+        magic_path._list_dir = counting
+
+        try:
+            walker = iter(Walker(self.root).parallel(2, queue_size=4))
+            first = self.walk([next(walker)])
+            time.sleep(0.1)
+
+            # The root and at most four directories ahead of the walk.
+            self.assertLessEqual(len(listed), 5)
+            self.assertListEqual(first + self.walk(walker), walk)
+        finally:
+            magic_path._list_dir = list_dir
+
+    def test_parallel_error(self):
+        # The name can't be decoded with the unicode path of the walk.
+        open(os.path.join(self.root, 'a', 'b', b'bad\xff'), 'w').close()
+
+        for walker in (Walker(self.root), Walker(self.root).parallel(2),
+                       Walker(self.root).parallel(2, ordered=False)):
+            self.assertRaises(UnicodeDecodeError, self.walk, walker)
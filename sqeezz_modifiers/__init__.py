@@ -1,9 +1,17 @@
 # coding=utf-8
+from functools import partial
+from inspect import ismethod
+from itertools import izip
+from threading import Condition, local
+from timeit import default_timer
+
+from sqeezz import Scoped
 from sqeezz.libs.decorator import decorate
-from sqeezz.utils import FuncUtils, is_callable
+from sqeezz.utils import FileUtils, FuncUtils, is_callable
 
 
 _test_type = False
+_NoneType = type(None)
 
 
 class _Type(FuncUtils):
@@ -19,6 +27,55 @@ class _Type(FuncUtils):
         """
         self.args = args
         self.kwargs = kwargs
+        self.checks = ()
+
+    def __call__(self, func, *args, **kwargs):
+        """
+        Check the types when testing is enabled and call the function.
+
+        :param func: callable
+        :param args: varargs
+        :param kwargs: keywords
+        :return: the function's return value
+        """
+        if _test_type:
+            count = len(args)
+
+            for index, name, required_type, required_types in self.checks:
+                if index is not None and index < count:
+                    value = args[index]
+                elif name in kwargs:
+                    value = kwargs[name]
+                else:
+                    continue
+
+                if not isinstance(value, required_type):
+                    raise TypeError('{} is {} and not of type {}'.format(
+                        name, repr(value), required_types))
+
+        return func(*args, **kwargs)
+
+    def compile(self, func):
+        """
+        Map the types to the positions of the parameters of the function, a
+        None in the types is replaced with the type of None.
+
+        :param func: callable
+        :return: self
+        """
+        names = self.spec(func).args
+        types = dict(self.kwargs)
+        types.update(izip(names, self.args))
+        checks = []
+
+        for name, required_types in types.iteritems():
+            index = names.index(name) if name in names else None
+            checks.append((index, name, _replace_none(required_types),
+                           required_types))
+
+        self.checks = tuple(checks)
+
+        return self
 
 
 class Call(FuncUtils):
@@ -41,6 +98,9 @@ class Call(FuncUtils):
 
     kwargs['arg3'] # <-- This will have your value.
     """
+    __slots__ = ('__accepted', '__args', '__call', '__kwargs', '__layout',
+                 '__names')
+
     def __init__(self, callback, *args, **kwargs):
         """
         Store the callable and the default arguments and keyword arguments.
@@ -50,8 +110,29 @@ class Call(FuncUtils):
         :param kwargs: keywords
         """
         self.__call = callback
-        self.args = args
-        self.kwargs = kwargs
+        self.__args = args
+        self.__kwargs = kwargs
+
+        try:
+            spec = self.spec(callback)
+        except TypeError:
+            # Classes and built-in callables can't be inspected, so their
+            # arguments are passed as they are.
+            self.__names = None
+            self.__accepted = None
+            self.__layout = None
+            return
+
+        names = spec.args
+
+        if ismethod(callback) and callback.__self__ is not None:
+            # A bound method is given self when it is called.
+            names = names[1:]
+
+        self.__names = tuple(names)
+        # None when the callable has **kwargs and accepts any keyword.
+        self.__accepted = None if spec.keywords else frozenset(names)
+        self.__build()
 
     def __call__(self, *args, **kwargs):
         """
@@ -64,17 +145,82 @@ class Call(FuncUtils):
         :param kwargs: keywords
         :return: the stored callable's return value
         """
-        mapped_args = self.create_args_dict(self.__call, self.args)
-        mapped_passed_args = self.create_args_dict(self.__call, args)
-        copy_kwargs = self.kwargs.copy()
+        if self.__names is None:
+            return self.__passed(args, kwargs)
+
+        accepted = self.__accepted
+
+        if not kwargs:
+            if not args:
+                return self.__call(**self.__layout)
+            elif accepted is not None and len(args) >= len(self.__names):
+                return self.__call(*args[:len(self.__names)])
+
+        call_kwargs = self.__layout.copy()
+
+        if accepted is None:
+            call_kwargs.update(kwargs)
+        else:
+            for key, value in kwargs.iteritems():
+                if key in accepted:
+                    call_kwargs[key] = value
+
+        call_kwargs.update(izip(self.__names, args))
+
+        return self.__call(**call_kwargs)
+
+    def __build(self):
+        """
+        Private method that merges the instantiation arguments into the
+        keyword arguments the callable accepts.
+        """
+        if self.__names is None:
+            return
+
+        layout = {}
+        accepted = self.__accepted
+
+        for key, value in self.__kwargs.iteritems():
+            if accepted is None or key in accepted:
+                layout[key] = value
+
+        layout.update(izip(self.__names, self.__args))
+        self.__layout = layout
+
+    def __passed(self, args, kwargs):
+        """
+        Private method that calls a callable that can't be inspected, the
+        call arguments replace the instantiation arguments by position.
+
+        :param args: tuple of call arguments
+        :param kwargs: dictionary of call keyword arguments
+        :return: the stored callable's return value
+        """
+        if kwargs:
+            call_kwargs = self.__kwargs.copy()
+            call_kwargs.update(kwargs)
+        else:
+            call_kwargs = self.__kwargs
+
+        return self.__call(*(args + self.__args[len(args):]), **call_kwargs)
+
+    @property
+    def args(self):
+        return self.__args
 
-        copy_kwargs.update(mapped_args)
-        copy_kwargs.update(kwargs)
-        copy_kwargs.update(mapped_passed_args)
+    @args.setter
+    def args(self, args):
+        self.__args = args
+        self.__build()
 
-        self.remove_invalid_kwargs(self.__call, [], copy_kwargs)
+    @property
+    def kwargs(self):
+        return self.__kwargs
 
-        return self.__call(**copy_kwargs)
+    @kwargs.setter
+    def kwargs(self, kwargs):
+        self.__kwargs = kwargs
+        self.__build()
 
 
 class Data(object):
@@ -96,7 +242,7 @@ class Data(object):
         :param args: varargs
         :param kwargs: keywords
         """
-        self.__enter = Call(callback, args, kwargs)
+        self.__enter = Call(callback, *args, **kwargs)
         self.__exit = None
         self.__open_command = None
 
@@ -107,7 +253,7 @@ class Data(object):
 
         :return: file-like object
         """
-        self.__open_command = self.__enter()
+        self.__open_command = self._create()
 
         return self.__open_command
 
@@ -124,27 +270,320 @@ class Data(object):
         :return: None
         """
         try:
-            if is_callable(self.__exit):
-                self.__exit(self.__open_command,
-                            *self.__exit.spec_args,
-                            **self.__exit.kwargs)
+            self._exit_callback(self.__open_command)
         finally:
             self.__open_command.close()
 
+    def _create(self):
+        """
+        Calls the main function.
+
+        :return: file-like object
+        """
+        return self.__enter()
+
+    def _exit_callback(self, obj):
+        """
+        Calls the exit callback with the file-like object, if there is one.
+
+        :param obj: file-like object
+        :return: None
+        """
+        if is_callable(self.__exit):
+            self.__exit(obj)
+
     def exit(self, callback, *args, **kwargs):
         """
         Sets the callback to call before closing the file-like object.
 
+        The file-like object is given as the first argument, followed by the
+        arguments given here.
+
         :param callback: a callable
         :param args: varargs
         :param kwargs: keywords
         :return: self
         """
-        self.__exit = Call(callback, args, kwargs)
+        # None holds the place of the file-like object.
+        self.__exit = Call(callback, None, *args, **kwargs)
 
         return self
 
 
+class Pool(Data):
+    """
+    A Data wrapper that keeps the file-like objects open between 'with'
+    statements, like database connections.
+
+    On exit the exit callback is called to reset the object, which is then
+    returned to the pool instead of being closed. Objects that have been idle
+    for too long or that fail the health check are closed and replaced.
+
+    The pool can be registered as a provider, and the injected function uses
+    it with the 'with' statement:
+
+    Sqeezz.register(db=Pool(connect, 'app.db').size(4))
+
+    @inject
+    def query(db=Injected):
+        with db as connection:
+            ...
+
+    To inject the pooled objects themselves, register it with Pooled.
+    """
+    def __init__(self, callback, *args, **kwargs):
+        """
+        Takes a callback and arguments to be used when the pool needs a new
+        file-like object.
+
+        :param callback: a callable
+        :param args: varargs
+        :param kwargs: keywords
+        """
+        super(Pool, self).__init__(callback, *args, **kwargs)
+        self.__acquired = local()
+        self.__created = 0
+        self.__health = None
+        self.__idle = []
+        self.__idle_timeout = None
+        self.__max_size = 8
+        self.__ready = Condition()
+        self.__timeout = None
+
+    def __enter__(self):
+        """
+        Acquires an object from the pool for this 'with' statement.
+
+        :return: file-like object
+        """
+        obj = self.acquire()
+        self.__stack().append(obj)
+
+        return obj
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Resets the object with the exit callback and returns it to the pool.
+
+        :param exc_type: exception type
+        :param exc_val: exception value
+        :param exc_tb: exception traceback
+        :return: None
+        """
+        self.release(self.__stack().pop())
+
+    def acquire(self):
+        """
+        Gets an idle object from the pool or creates one if the pool isn't
+        full, otherwise waits for one to be released.
+
+        !!! Warning !!!
+        You must return the object with release yourself.
+
+        :return: file-like object
+        """
+        deadline = None
+
+        if self.__timeout is not None:
+            deadline = default_timer() + self.__timeout
+
+        while True:
+            with self.__ready:
+                while not self.__idle and self.__created >= self.__max_size:
+                    if deadline is None:
+                        self.__ready.wait()
+                        continue
+
+                    remaining = deadline - default_timer()
+
+                    if remaining <= 0:
+                        raise RuntimeError(
+                            'No object was released within {} seconds.'
+                            .format(self.__timeout))
+
+                    self.__ready.wait(remaining)
+
+                if self.__idle:
+                    released, obj = self.__idle.pop()
+                else:
+                    released = obj = None
+                    self.__created += 1
+
+            if released is None:
+                try:
+                    return self._create()
+                except:
+                    self.__discard(None)
+                    raise
+
+            if self.__usable(released, obj):
+                return obj
+
+            self.__discard(obj)
+
+    def close(self):
+        """
+        Closes the idle objects, objects in use are returned to the pool when
+        they are released.
+
+        :return: None
+        """
+        with self.__ready:
+            idle, self.__idle = self.__idle, []
+            self.__created -= len(idle)
+            self.__ready.notify_all()
+
+        for released, obj in idle:
+            obj.close()
+
+    def health(self, callback=None):
+        """
+        Sets the callback that checks an idle object before it is reused, it
+        is given the object and returns False when the object is broken.
+
+        :param callback: a callable (default: None)
+        :return: self
+        """
+        self.__health = callback
+
+        return self
+
+    def idle(self, seconds=None):
+        """
+        Sets how long an object can be idle before it is closed.
+
+        :param seconds: number of seconds (default: None, never)
+        :return: self
+        """
+        self.__idle_timeout = seconds
+
+        return self
+
+    def idle_count(self):
+        """
+        The number of objects in the pool that are not in use.
+
+        :return: int
+        """
+        return len(self.__idle)
+
+    def release(self, obj):
+        """
+        Resets the object with the exit callback and returns it to the pool,
+        the object is closed if the exit callback fails.
+
+        :param obj: file-like object from acquire
+        :return: None
+        """
+        try:
+            self._exit_callback(obj)
+        except:
+            self.__discard(obj)
+            raise
+
+        with self.__ready:
+            self.__idle.append((default_timer(), obj))
+            self.__ready.notify()
+
+    def size(self, max_size=8):
+        """
+        Sets the maximum number of objects, idle and in use.
+
+        :param max_size: number of objects (default: 8)
+        :return: self
+        """
+        self.__max_size = max_size
+
+        return self
+
+    def timeout(self, seconds=None):
+        """
+        Sets how long acquire waits for an object to be released before
+        raising a RuntimeError.
+
+        :param seconds: number of seconds (default: None, forever)
+        :return: self
+        """
+        self.__timeout = seconds
+
+        return self
+
+    def __discard(self, obj):
+        """
+        Private method that closes an object and frees its place in the pool.
+
+        :param obj: file-like object or None if it wasn't created
+        """
+        with self.__ready:
+            self.__created -= 1
+            self.__ready.notify()
+
+        if obj is not None:
+            obj.close()
+
+    def __stack(self):
+        """
+        Private method for the objects acquired by the 'with' statement in
+        this thread.
+
+        :return: list
+        """
+        try:
+            return self.__acquired.stack
+        except AttributeError:
+            self.__acquired.stack = []
+
+            return self.__acquired.stack
+
+    def __usable(self, released, obj):
+        """
+        Private method that checks if an idle object can be reused.
+
+        :param released: time the object was released
+        :param obj: file-like object
+        :return: boolean
+        """
+        if self.__idle_timeout is not None and \
+                default_timer() - released > self.__idle_timeout:
+            return False
+
+        if self.__health is None:
+            return True
+
+        try:
+            return bool(self.__health(obj))
+        except Exception:
+            return False
+
+
+class Pooled(Scoped):
+    """
+    A Scoped provider that injects an object acquired from a Pool, it is
+    acquired the first time it is injected in a 'with Sqeezz.scope():' block
+    and released at the end of the block.
+
+    Sqeezz.register(db=Pooled(Pool(connect, 'app.db').size(4)))
+
+    @inject
+    def query(db=Injected):
+        return db.execute(...)
+
+    with Sqeezz.scope():
+        query()
+    """
+    def __init__(self, pool):
+        """
+        Store the pool the objects are acquired from.
+
+        :param pool: Pool
+        """
+        super(Pooled, self).__init__(pool.acquire)
+        self.pool = pool
+
+    def release(self, instance):
+        self.pool.release(instance)
+
+
 class File(Data):
     """
     A wrapper for the open function that allows you to store the arguments
@@ -161,6 +600,8 @@ class File(Data):
         """
         self.__path = path
         self.__file_command = file_command
+        self.__args = args
+        self.__kwargs = kwargs
         super(File, self).__init__(self.__open, args, kwargs)
 
     def __open(self, args, kwargs):
@@ -187,68 +628,65 @@ class File(Data):
         """
         return self.__open(args, kwargs)
 
-
-def _strict_type(s_type):
-    """
-    Private function for the strict_type decorator.
-
-    :param s_type: _Type object
-    :return: function
-    """
-    def _check_type(name, arg_value, required_types):
-        """
-        Private function for checking type and raising a TypeError if not
-        matching.
+    def chunks(self, size=None):
         """
-        allow_none, required_type = _extract_none(required_types)
+        Reads the file into one reusable buffer, so each chunk is only valid
+        until the next one is read. A file command other than open is used
+        with its arguments, like gzip.open.
 
-        if not isinstance(arg_value, required_type):
-            if allow_none and arg_value is None:
-                return
+        :param size: bytes read at a time
+        :return: generator of memoryview chunks
+        """
+        if self.__file_command is open:
+            return FileUtils.chunks(self.__path, size)
 
-            raise TypeError('{} is {} and not of type {}'.format(
-                name, repr(arg_value), required_types))
+        return FileUtils.chunks(self.__path, size, partial(
+            self.__open, self.__args, self.__kwargs))
 
-    def _extract_none(required_types):
+    def lines(self, buffering=None):
         """
-        Private function for extracting None from a tuple used for testing
-        types.
+        Opens the file with the file command and its arguments to iterate
+        over its lines, the buffering is passed to it as a keyword.
+
+        !!! Warning !!!
+        Use it with the 'with' statement so the file is closed.
+
+        :param buffering: buffer size
+        :return: file-like object
         """
-        allow_none = False
+        kwargs = self.__kwargs
 
-        try:
-            if None in required_types:
-                required_type = list(required_types)
-                allow_none = True
-                required_type.remove(None)
-                if len(required_type) > 1:
-                    required_types = tuple(required_type)
-                else:
-                    required_types = required_type[0]
-        except TypeError:
-            pass
+        if buffering is not None:
+            kwargs = dict(kwargs, buffering=buffering)
 
-        return allow_none, required_types
+        return self.__open(self.__args, kwargs)
 
-    def _inner(func, *args, **kwargs):
+    def mmap(self):
         """
-        Private function that is used for the strict_type decorator.
+        Maps the file for reading with the 'with' statement. The bytes on
+        disk are mapped without the file command, so it is only meant for
+        plain files.
+
+        :return: context manager of a memoryview/buffer of the file
         """
+        return FileUtils.map(self.__path)
 
-        if _test_type:
-            args = list(args)
-            mapped_args = s_type.create_args_dict(func, args)
-            s_type.kwargs.update(s_type.create_args_dict(func, s_type.args))
 
-            for key, value in s_type.kwargs.iteritems():
-                if key in kwargs:
-                    _check_type(key, kwargs[key], value)
+def _replace_none(required_types):
+    """
+    Private function that replaces None in a tuple used for testing types with
+    the type of None.
 
-                if key in mapped_args:
-                    _check_type(key, mapped_args[key], value)
+    :param required_types: class or tuple of classes
+    :return: class or tuple of classes
+    """
+    if isinstance(required_types, tuple):
+        return tuple(_NoneType if required_type is None else required_type
+                     for required_type in required_types)
+    elif required_types is None:
+        return _NoneType
 
-        return func(*args, **kwargs)
-    return _inner
+    return required_types
 
 
 def strict_type(*args, **kwargs):
@@ -264,11 +702,22 @@ def strict_type(*args, **kwargs):
         """
         Private decorator function.
         """
-        return decorate(func, _strict_type(_Type(args, kwargs)))
+        return decorate(func, _Type(args, kwargs).compile(func))
 
     return _inner
 
 
+def rewrap(func):
+    """
+    Returns the checked function of a function or method decorated with
+    @strict_type, a method is unwrapped to its function.
+
+    :param func: callable
+    :return: checked function
+    """
+    return getattr(func, '__func__', func)
+
+
 def test_type(test):
     """
     Enable or disable strict type testing (defaults to False).
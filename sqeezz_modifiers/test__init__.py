@@ -1,8 +1,31 @@
 # coding=utf-8
+import codecs
+import gzip
+import os
+import sqlite3
+import tempfile
+import time
 import unittest
+from threading import Thread
+
+from sqeezz import Injected, Sqeezz, inject
 from sqeezz_modifiers import *
 
 
+class Resource(object):
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+def connect(name):
+    return Resource(name)
+
+
 class TestCallClass(unittest.TestCase):
     def test_call_class(self):
         def test_func(arg1, arg2):
@@ -19,6 +42,42 @@ class TestCallClass(unittest.TestCase):
 
         self.assertTupleEqual(test_data, (1, 2))
 
+    def test_call_keywords(self):
+        def test_func(arg1, arg2=None):
+            return arg1, arg2
+
+        def test_kwargs(arg1, **kwargs):
+            return arg1, kwargs
+
+        # Keywords that the callable does not accept are removed.
+        test_call = Call(test_func, arg3=3)
+
+        self.assertTupleEqual(test_call(1, arg4=4), (1, None))
+        self.assertTupleEqual(test_call(arg1=1, arg2=2), (1, 2))
+
+        # Unless it takes any keyword.
+        test_call = Call(test_kwargs, 1, arg2=2)
+
+        self.assertTupleEqual(test_call(arg3=3), (1, {'arg2': 2, 'arg3': 3}))
+
+    def test_call_method(self):
+        class Test(object):
+            def method(self, arg1):
+                return arg1
+
+        test_call = Call(Test().method, 1)
+
+        self.assertEqual(test_call(), 1)
+        self.assertEqual(test_call(2), 2)
+
+    def test_call_builtin(self):
+        to_int = Call(int, '10')
+
+        self.assertEqual(to_int(), 10)
+        self.assertEqual(to_int('11'), 11)
+        self.assertEqual(to_int('ff', 16), 255)
+        self.assertDictEqual(Call(dict, foo=1)(bar=2), {'foo': 1, 'bar': 2})
+
 
 class TestDataClass(unittest.TestCase):
     def test_error(self):
@@ -27,16 +86,239 @@ class TestDataClass(unittest.TestCase):
     def test_exit(self):
         self.fail()
 
+    def test_exit_callback(self):
+        calls = []
+        data = Data(connect, 'db').exit(
+            lambda obj, action: calls.append((obj.name, action)), 'commit')
+
+        with data as resource:
+            self.assertEqual(resource.name, 'db')
+
+        self.assertListEqual(calls, [('db', 'commit')])
+        self.assertTrue(resource.closed)
+
+
+class TestPoolClass(unittest.TestCase):
+    def test_reuse(self):
+        resets = []
+        pool = Pool(connect, 'db').exit(lambda obj: resets.append(obj))
+
+        with pool as first:
+            with pool as second:
+                self.assertIsNot(first, second)
+
+        with pool as third:
+            self.assertIn(third, (first, second))
+
+        self.assertEqual(len(resets), 3)
+        self.assertFalse(first.closed or second.closed)
+        self.assertEqual(pool.idle_count(), 2)
+        self.assertTrue(pool)
+
+        pool.close()
+
+        self.assertTrue(first.closed and second.closed)
+        self.assertEqual(pool.idle_count(), 0)
+
+    def test_health(self):
+        pool = Pool(connect, 'db').health(lambda obj: obj.healthy)
+
+        with pool as first:
+            first.healthy = False
+
+        with pool as second:
+            self.assertIsNot(first, second)
+
+        self.assertTrue(first.closed)
+
+    def test_idle(self):
+        pool = Pool(connect, 'db').idle(0)
+
+        with pool as first:
+            pass
+
+        time.sleep(0.01)
+
+        with pool as second:
+            self.assertIsNot(first, second)
+
+        self.assertTrue(first.closed)
+
+    def test_timeout(self):
+        pool = Pool(connect, 'db').size(1).timeout(0.01)
+
+        with pool:
+            self.assertRaises(RuntimeError, pool.acquire)
+
+        pool.release(pool.acquire())
+
+    def test_threads(self):
+        pool = Pool(connect, 'db').size(2)
+        created = set()
+
+        def work():
+            for i in xrange(50):
+                with pool as resource:
+                    created.add(resource)
+
+        threads = [Thread(target=work) for i in xrange(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(len(created), 2)
+        self.assertEqual(pool.idle_count(), len(created))
+
+    def test_builtin(self):
+        pool = Pool(sqlite3.connect, ':memory:').exit(
+            lambda connection: connection.rollback())
+
+        with pool as connection:
+            connection.execute('CREATE TABLE pooled (value INTEGER)')
+
+        with pool as reused:
+            self.assertIs(reused, connection)
+            self.assertListEqual(
+                reused.execute('SELECT * FROM pooled').fetchall(), [])
+
+        pool.close()
+
+    def test_injected(self):
+        pool = Pool(connect, 'db')
+        Sqeezz.register(test_pool=pool)
+
+        @inject
+        def query(test_pool=Injected):
+            with test_pool as resource:
+                return resource
+
+        self.assertIs(query(), query())
+
+    def test_pooled(self):
+        pool = Pool(connect, 'db')
+        Sqeezz.register(test_pooled=Pooled(pool))
+
+        @inject
+        def query(test_pooled=Injected):
+            return test_pooled
+
+        with Sqeezz.scope():
+            first = query()
+
+            self.assertIsInstance(first, Resource)
+            self.assertIs(query(), first)
+            self.assertEqual(pool.idle_count(), 0)
+
+        self.assertEqual(pool.idle_count(), 1)
+
+        with Sqeezz.scope():
+            self.assertIs(query(), first)
+
+        self.assertFalse(first.closed)
+
 
 class TestFileClass(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, b'line 1\nline 2\nline 3\n')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
     def test_open(self):
         self.fail()
 
+    def test_with(self):
+        with File(self.path, open, 'rb') as file_obj:
+            self.assertEqual(file_obj.readline(), b'line 1\n')
+
+    def test_chunks(self):
+        chunks = [chunk.tobytes() for chunk in File(self.path).chunks(4)]
+
+        self.assertEqual(chunks[0], b'line')
+        self.assertEqual(b''.join(chunks), b'line 1\nline 2\nline 3\n')
+
+    def test_chunks_command(self):
+        compressed = self.path + '.gz'
+        file_obj = gzip.open(compressed, 'wb')
+        file_obj.write(b'line 1\n' * 100)
+        file_obj.close()
+
+        try:
+            chunks = [chunk.tobytes() for chunk in
+                      File(compressed, gzip.open, 'rb').chunks(64)]
+        finally:
+            os.remove(compressed)
+
+        self.assertEqual(len(chunks[0]), 64)
+        self.assertEqual(b''.join(chunks), b'line 1\n' * 100)
+
+    def test_lines(self):
+        with File(self.path).lines(16) as lines:
+            self.assertListEqual(list(lines),
+                                 [b'line 1\n', b'line 2\n', b'line 3\n'])
+
+    def test_lines_command(self):
+        with File(self.path, codecs.open, 'r', 'utf-8').lines() as lines:
+            lines = list(lines)
+
+        self.assertListEqual(lines, [u'line 1\n', u'line 2\n', u'line 3\n'])
+        self.assertIsInstance(lines[0], unicode)
+
+    def test_mmap(self):
+        with File(self.path).mmap() as view:
+            self.assertEqual(bytes(view[:6]), b'line 1')
+            self.assertEqual(len(view), 21)
+
 
 class TestStrictTypeDecorator(unittest.TestCase):
     def test_strict_type(self):
         self.fail()
 
+    def test_strict_type_checking(self):
+        test_type(True)
+
+        try:
+            @strict_type(int, arg2=(str, None))
+            def test_func(arg1, arg2=None):
+                return arg1, arg2
+
+            self.assertTupleEqual(test_func(1, 'a'), (1, 'a'))
+            self.assertTupleEqual(test_func(1), (1, None))
+            self.assertRaises(TypeError, test_func, 'a')
+            self.assertRaises(TypeError, test_func, 1, 2)
+        finally:
+            test_type(False)
+
+        self.assertTupleEqual(test_func('a', 2), ('a', 2))
+
+    def test_strict_type_disabled(self):
+        @strict_type(int)
+        def test_func(arg1):
+            return arg1
+
+        class Test(object):
+            @strict_type(arg1=int)
+            def method(self, arg1):
+                return arg1
+
+        self.assertEqual(test_func('a'), 'a')
+
+        # Functions decorated before testing is enabled are checked after.
+        test_type(True)
+
+        try:
+            self.assertRaises(TypeError, test_func, 'a')
+            self.assertRaises(TypeError, Test().method, 'a')
+            self.assertRaises(TypeError, rewrap(Test.method), Test(), 'a')
+            self.assertEqual(rewrap(Test.method)(Test(), 1), 1)
+        finally:
+            test_type(False)
+
 
 if __name__ == '__main__':
     unittest.main()